@@ -1,7 +1,54 @@
-from .replies import (BarConfigReply, CommandReply, ConfigReply, OutputReply, TickReply,
-                      VersionReply, WorkspaceReply, SeatReply, InputReply)
-from .events import (BarconfigUpdateEvent, BindingEvent, BindingInfo, OutputEvent, ShutdownEvent,
-                     WindowEvent, TickEvent, ModeEvent, WorkspaceEvent, InputEvent, Event)
-from .con import Con
-from .model import Rect, Gaps
-from .connection import Connection
+# The public names are loaded on first access (PEP 562), so that importing
+# asway does not pull in anyio and friends before they are needed.
+
+_lazy = {
+    'BarConfigReply': 'replies',
+    'CommandReply': 'replies',
+    'ConfigReply': 'replies',
+    'OutputReply': 'replies',
+    'TickReply': 'replies',
+    'VersionReply': 'replies',
+    'WorkspaceReply': 'replies',
+    'SeatReply': 'replies',
+    'InputReply': 'replies',
+    'BarconfigUpdateEvent': 'events',
+    'BindingEvent': 'events',
+    'BindingInfo': 'events',
+    'OutputEvent': 'events',
+    'ShutdownEvent': 'events',
+    'WindowEvent': 'events',
+    'TickEvent': 'events',
+    'ModeEvent': 'events',
+    'WorkspaceEvent': 'events',
+    'InputEvent': 'events',
+    'SeatEvent': 'events',
+    'BarStateUpdateEvent': 'events',
+    'ConnectionEvent': 'events',
+    'Event': 'events',
+    'Con': 'con',
+    'TreeDiff': 'con',
+    'Rect': 'model',
+    'Gaps': 'model',
+    'Connection': 'connection',
+    'ReconnectPolicy': 'connection',
+    'TreeMirror': 'mirror',
+    'EventType': '_private.types',
+}
+
+__all__ = list(_lazy)
+
+
+def __getattr__(name):
+    try:
+        module = _lazy[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+
+    from importlib import import_module
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -74,6 +74,8 @@ class Con(con.Con):
     :ivar ipc_data: The raw data from the i3 ipc.
     :vartype ipc_data: dict
     """
+    __slots__ = ()
+
     async def command(self, command: str) -> List[CommandReply]:
         """Runs a command on this container.
 
@@ -0,0 +1,84 @@
+"""JSON decoding of ipc messages.
+
+The fastest installed backend is used unless one is chosen explicitly. All
+decoders accept ``bytes``, ``bytearray`` and ``memoryview`` and fall back
+to the standard library for payloads that are not valid UTF-8 (window
+titles can be anything).
+"""
+import json
+from typing import Any, Callable, Optional
+
+BACKENDS = ('msgspec', 'orjson', 'json')
+
+
+def _loads_fallback(data) -> Any:
+    return json.loads(bytes(data).decode('utf-8', 'surrogateescape'))
+
+
+def _json_loads() -> Callable[[Any], Any]:
+    def loads(data):
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        try:
+            return json.loads(data)
+        except UnicodeDecodeError:
+            return _loads_fallback(data)
+
+    return loads
+
+
+def _orjson_loads() -> Callable[[Any], Any]:
+    import orjson
+
+    def loads(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return _loads_fallback(data)
+
+    return loads
+
+
+def _msgspec_loads() -> Callable[[Any], Any]:
+    import msgspec
+
+    decode = msgspec.json.Decoder().decode
+
+    def loads(data):
+        try:
+            return decode(data)
+        except msgspec.DecodeError:
+            return _loads_fallback(data)
+
+    return loads
+
+
+_factories = {
+    'msgspec': _msgspec_loads,
+    'orjson': _orjson_loads,
+    'json': _json_loads,
+}
+
+
+def get_loads(backend: Optional[str] = None) -> Callable[[Any], Any]:
+    """Returns a function that decodes a JSON message.
+
+    :param backend: One of ``"msgspec"``, ``"orjson"`` or ``"json"``. If not
+        given, use the first one of these that is installed.
+    :type backend: str
+    :raises ValueError: If the backend is unknown.
+    :raises ImportError: If the backend is not installed.
+    """
+    if backend is not None:
+        try:
+            factory = _factories[backend]
+        except KeyError:
+            raise ValueError(f'unknown JSON backend: {backend!r}') from None
+        return factory()
+
+    for backend in BACKENDS[:-1]:
+        try:
+            return _factories[backend]()
+        except ImportError:
+            continue
+    return _json_loads()
@@ -0,0 +1,143 @@
+from collections import deque
+from inspect import iscoroutine
+from typing import Callable, Hashable, Optional, Tuple
+
+import anyio
+
+
+def event_key(event) -> Tuple[Optional[str], Optional[Hashable]]:
+    """The change of an event and the id of the container it is about (the
+    ``container`` of window events, the ``current`` workspace of workspace
+    events), if any.
+    """
+    con = getattr(event, 'container', None)
+    if con is None:
+        con = getattr(event, 'current', None)
+    return getattr(event, 'change', None), getattr(con, 'id', None)
+
+
+def container_key(event) -> Optional[Hashable]:
+    """The id of the container an event is about, whatever the change."""
+    return event_key(event)[1]
+
+
+async def _call(handler, event):
+    r = handler(event)
+    if iscoroutine(r):
+        await r
+
+
+class Coalescer:
+    """Wraps an event handler so that it gets only the latest event per
+    change and container within ``delay`` seconds.
+
+    The first event of a key starts the delay; events with the same key
+    that arrive before it ends replace it. The handler then runs once with
+    the latest one.
+    """
+    def __init__(self, conn, handler, delay: float):
+        self.conn = conn
+        self.handler = handler
+        self.delay = delay
+        self._pending = {}
+        self._closed = False
+
+    def __call__(self, event):
+        key = event_key(event)
+        if key in self._pending:
+            self._pending[key] = event
+            return
+        self._pending[key] = event
+        self.conn.tg.start_soon(self._deliver, key)
+
+    async def _deliver(self, key):
+        await anyio.sleep(self.delay)
+        event = self._pending.pop(key)
+        if self._closed:
+            return
+        await _call(self.handler, event)
+
+    def close(self):
+        """Drops the events that are still waiting."""
+        self._closed = True
+
+
+class OrderedDispatcher:
+    """Wraps an event handler so that it runs for one event after the other
+    per key, while events with different keys are handled concurrently.
+
+    Each key with pending events has a worker task; it ends when no events
+    of its key are left.
+    """
+    def __init__(self, conn, handler, key: Callable[[object], Hashable] = container_key):
+        self.conn = conn
+        self.handler = handler
+        self.key = key
+        self._queues = {}
+        self._closed = False
+
+    def __call__(self, event):
+        key = self.key(event)
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append(event)
+            return
+        self._queues[key] = queue = deque((event,))
+        self.conn.tg.start_soon(self._work, key, queue)
+
+    async def _work(self, key, queue):
+        try:
+            while queue and not self._closed:
+                await _call(self.handler, queue[0])
+                queue.popleft()
+        finally:
+            del self._queues[key]
+
+    def close(self):
+        """Drops the events that are still waiting."""
+        self._closed = True
+
+
+class ConcurrentDispatcher:
+    """Wraps an event handler so that each event is handled in a task of its
+    own, at most ``limit`` of them at a time.
+    """
+    def __init__(self, conn, handler, limit: Optional[int] = None):
+        self.conn = conn
+        self.handler = handler
+        self._limiter = anyio.CapacityLimiter(limit) if limit else None
+        self._closed = False
+
+    def __call__(self, event):
+        self.conn.tg.start_soon(self._run, event)
+
+    async def _run(self, event):
+        if self._limiter is None:
+            await _call(self.handler, event)
+            return
+        async with self._limiter:
+            if not self._closed:
+                await _call(self.handler, event)
+
+    def close(self):
+        """Drops the events that are still waiting for the limiter."""
+        self._closed = True
+
+
+def _serial_key(event):
+    return None
+
+
+DISPATCH_MODES = ('serial', 'concurrent', 'ordered')
+
+
+def dispatcher(conn, handler, mode: str, limit: Optional[int] = None,
+               key: Optional[Callable[[object], Hashable]] = None):
+    """Wraps the handler for the dispatch mode."""
+    if mode == 'serial':
+        return OrderedDispatcher(conn, handler, _serial_key)
+    if mode == 'concurrent':
+        return ConcurrentDispatcher(conn, handler, limit)
+    if mode == 'ordered':
+        return OrderedDispatcher(conn, handler, key or container_key)
+    raise ValueError(f'unknown dispatch mode: {mode!r}')
@@ -0,0 +1,61 @@
+"""Framing of i3/sway ipc messages.
+
+Every message starts with the magic string, the payload length and the
+message type.
+"""
+import struct
+from typing import Tuple
+
+MAGIC = b'i3-ipc'  # safety string for i3-ipc
+HEADER = struct.Struct(f'={len(MAGIC)}sII')
+
+
+def pack(message_type: int, payload: str) -> bytes:
+    pb = payload.encode()
+    return HEADER.pack(MAGIC, len(pb), message_type) + pb
+
+
+class FrameReader:
+    """Reads ipc messages from a byte stream.
+
+    Data is received in large chunks into a buffer that is reused, so one
+    receive can return several queued messages. The payloads are
+    ``memoryview`` objects into that buffer and are only valid until the
+    next call to :meth:`receive`.
+    """
+    def __init__(self, stream, chunk_size: int = 65536):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+        self._pos = 0
+        self._view = None
+
+    async def receive(self) -> Tuple[int, memoryview]:
+        """Reads the next message.
+
+        :returns: The message type and the payload.
+        :raises anyio.EndOfStream: If the stream ends.
+        """
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+
+        buf = self._buf
+        while True:
+            start = self._pos + HEADER.size
+            if len(buf) >= start:
+                magic, length, message_type = HEADER.unpack_from(buf, self._pos)
+                if magic != MAGIC:
+                    raise RuntimeError(f'bad magic in ipc message: {magic!r}')
+                end = start + length
+                if len(buf) >= end:
+                    self._pos = end
+                    with memoryview(buf) as view:
+                        self._view = view[start:end]
+                    return message_type, self._view
+
+            # drop what has been read and wait for more
+            if self._pos:
+                del buf[:self._pos]
+                self._pos = 0
+            buf += await self._stream.receive(self._chunk_size)
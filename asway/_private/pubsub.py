@@ -1,58 +1,143 @@
-from blinker import Signal as _Signal, ANY
+from inspect import iscoroutine, iscoroutinefunction
+
 
 class NotGiven:
     pass
 
-class Signal(_Signal):
-    def send(self,data=NotGiven):
-        """Emit this signal on behalf of *sender*, passing on ``data``.
-        """
-        if data is NotGiven:
-            for receiver in self.receivers_for(None):
-                receiver()
-        else:
-            for receiver in self.receivers_for(None):
-                receiver(data)
+
+def _is_async(handler) -> bool:
+    return iscoroutinefunction(handler) or iscoroutinefunction(getattr(handler, '__call__', None))
+
+
+async def _await(r):
+    await r
 
 
 class PubSub(object):
+    """Calls the handlers of events.
+
+    The handlers of each ``(event, change)`` are looked up once and kept in a
+    dispatch index, split into plain and async callables, and so is the
+    result of :meth:`wanted` for each event. Subscribing or unsubscribing
+    clears the index.
+
+    A single handler is awaited by :meth:`emit`. With more than one, the
+    plain handlers are called in turn and the async ones run in tasks of
+    their own, except for those subscribed with ``wait=True``, which are
+    always awaited.
+    """
     def __init__(self, conn):
         self.conn = conn
+        self._tg = None
+        # (event, detail) => handlers
         self._subscriptions = {}
+        # (event, change) => (handler, or None if more than one; plain handlers; async handlers;
+        # awaited handlers)
+        self._index = {}
+        # the handlers that emit() always awaits
+        self._awaited = set()
+        # event => the result of wanted()
+        self._wanted = {}
+        self._signals = {}
 
-    def _signal(self, name):
-        return Signal(name)
-
-    def subscribe(self, detailed_event, handler):
+    def subscribe(self, detailed_event, handler, wait=False):
         event = detailed_event.replace('-', '_')
         detail = ''
 
         try:
-            event, detail = detailed_event.split('::', 1)
+            event, detail = event.split('::', 1)
         except ValueError:
             pass
 
-        v = (event,detail)
-        n = r"{event}::{detail}"
+        handlers = self._subscriptions.setdefault((event, detail), [])
+        if handler not in handlers:
+            handlers.append(handler)
+        if wait:
+            self._awaited.add(handler)
+        self._index.clear()
+        self._wanted.clear()
+
+    def wanted(self, event):
+        """Which details of this event have handlers.
+
+        :returns: ``None`` if nobody listens to the event, ``True`` if a
+            handler wants all of it, else the set of wanted details.
+        """
         try:
-            sig = self._subscriptions[v]
+            return self._wanted[event]
         except KeyError:
-            self._subscriptions[v] = sig = self._signal(n)
+            pass
 
-        sig.connect(handler)
+        details = set()
+        for (ev, detail), handlers in self._subscriptions.items():
+            if ev != event or not handlers:
+                continue
+            if not detail:
+                details = True
+                break
+            details.add(detail)
+        wanted = self._wanted[event] = details or None
+        return wanted
+
+    def events(self):
+        """The events that have handlers."""
+        return {event for (event, detail), handlers in self._subscriptions.items() if handlers}
 
     def unsubscribe(self, handler):
-        for v in self._subscriptions.values():
-            v.disconnect(handler)
+        for handlers in self._subscriptions.values():
+            try:
+                handlers.remove(handler)
+            except ValueError:
+                pass
+        self._awaited.discard(handler)
+        self._index.clear()
+        self._wanted.clear()
+
+    def signal(self, detailed_event):
+        """A :class:`blinker.Signal` for the event, for code written against
+        blinker. The caller subscribes its ``send`` method.
+        """
+        try:
+            return self._signals[detailed_event]
+        except KeyError:
+            pass
+        from blinker import Signal
 
-    def emit(self, event, data=NotGiven):
-        if data and hasattr(data, 'change'):
-            detail = data.change
+        self._signals[detailed_event] = sig = Signal(detailed_event)
+        return sig
 
-        sig = self._subscriptions.get((event,))
-        if sig is not None:
-            sig.send(data)
+    def _lookup(self, event, detail):
+        handlers = list(self._subscriptions.get((event, ''), ()))
         if detail:
-            sig = self._subscriptions.get((event,detail))
-            if sig is not None:
-                sig.send(data)
+            handlers.extend(self._subscriptions.get((event, detail), ()))
+        awaited = tuple(h for h in handlers if h in self._awaited)
+        others = [h for h in handlers if h not in self._awaited]
+        plain = tuple(h for h in others if not _is_async(h))
+        aio = tuple(h for h in others if _is_async(h))
+        entry = (handlers[0] if len(handlers) == 1 else None, plain, aio, awaited)
+        self._index[(event, detail)] = entry
+        return entry
+
+    async def emit(self, event, data=NotGiven):
+        detail = getattr(data, 'change', None) or ''
+        try:
+            single, plain, aio, awaited = self._index[(event, detail)]
+        except KeyError:
+            single, plain, aio, awaited = self._lookup(event, detail)
+
+        args = () if data is NotGiven else (data,)
+        if single is not None:
+            r = single(*args)
+            if r is not None and iscoroutine(r):
+                await r
+            return
+
+        tg = self._tg
+        for handler in plain:
+            r = handler(*args)
+            if r is not None and iscoroutine(r):
+                tg.start_soon(_await, r)
+        for handler in aio:
+            tg.start_soon(handler, *args)
+        for handler in awaited:
+            await handler(*args)
@@ -0,0 +1,113 @@
+from collections import deque
+from typing import Any, Callable, Hashable, Optional
+
+import anyio
+
+from .dispatch import event_key
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'coalesce')
+
+
+def default_key(item) -> Optional[Hashable]:
+    """Events that may replace each other: window and workspace events with
+    the same change for the same container. Nothing else is coalesced.
+    """
+    name, event = item
+    if name not in ('window', 'workspace'):
+        return None
+    change, con_id = event_key(event)
+    if con_id is None:
+        return None
+    return (name, change, con_id)
+
+
+class EventQueue:
+    """A bounded queue between the socket reader and the event dispatcher.
+
+    When the queue is full, ``overflow`` decides what happens to a new item:
+
+    * ``"block"``: wait until there is room.
+    * ``"drop_oldest"``: discard the oldest queued item.
+    * ``"coalesce"``: replace the queued item with the same key (in place,
+      so it keeps its position); block if there is none.
+
+    :ivar dropped: The number of items discarded.
+    :vartype dropped: int
+    :ivar coalesced: The number of items that replaced a queued one.
+    :vartype coalesced: int
+    """
+    def __init__(self,
+                 size: int,
+                 overflow: str = 'block',
+                 key: Callable[[Any], Optional[Hashable]] = default_key):
+        if size < 1:
+            raise ValueError('the queue size must be at least 1')
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'unknown overflow policy: {overflow!r}')
+        self.size = size
+        self.overflow = overflow
+        self._key = key
+        # each slot is [key, item], so that coalescing can replace the item
+        self._slots = deque()
+        self._by_key = {}
+        self._not_empty = None
+        self._not_full = None
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    async def put(self, item):
+        while not self.put_nowait(item):
+            if self._not_full is None:
+                self._not_full = anyio.Event()
+            await self._not_full.wait()
+
+    def put_nowait(self, item) -> bool:
+        """Like :meth:`put`, but doesn't wait for room.
+
+        :returns: Whether the item was queued (or replaced a queued one).
+        """
+        key = None
+        if self.overflow == 'coalesce':
+            key = self._key(item)
+
+        if len(self._slots) >= self.size:
+            if self.overflow == 'drop_oldest':
+                self._pop()
+                self.dropped += 1
+            else:
+                slot = self._by_key.get(key) if key is not None else None
+                if slot is None:
+                    return False
+                slot[1] = item
+                self.coalesced += 1
+                return True
+
+        slot = [key, item]
+        self._slots.append(slot)
+        if key is not None:
+            self._by_key[key] = slot
+        if self._not_empty is not None:
+            self._not_empty.set()
+            self._not_empty = None
+        return True
+
+    async def get(self):
+        while not self._slots:
+            if self._not_empty is None:
+                self._not_empty = anyio.Event()
+            await self._not_empty.wait()
+
+        item = self._pop()
+        if self._not_full is not None:
+            self._not_full.set()
+            self._not_full = None
+        return item
+
+    def _pop(self):
+        key, item = slot = self._slots.popleft()
+        if key is not None and self._by_key.get(key) is slot:
+            del self._by_key[key]
+        return item
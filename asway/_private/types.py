@@ -43,6 +43,8 @@ class EventType(Enum):
     TICK = (1 << 7)
     INPUT = (1 << 21)
     SEAT = (1 << 8)
+    # sway only
+    BAR_STATE_UPDATE = (1 << 20)
 
     def to_string(self):
         return str.lower(self.name)
@@ -78,5 +80,7 @@ class EventType(Enum):
             events_list.append(EventType.INPUT.to_string())
         if self.value & EventType.SEAT.value:
             events_list.append(EventType.SEAT.to_string())
+        if self.value & EventType.BAR_STATE_UPDATE.value:
+            events_list.append(EventType.BAR_STATE_UPDATE.to_string())
 
         return events_list
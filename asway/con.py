@@ -5,10 +5,26 @@ from . import replies
 from collections import deque
 from typing import List, Optional
 
+# a property that has not been built yet
+_unset = object()
+
+
+def _rect(data) -> Optional[Rect]:
+    return None if data is None else Rect(data)
+
 
 class Con:
     """A container of a window and child containers gotten from :func:`asway.Connection.get_tree()` or events.
 
+    Containers use ``__slots__`` and cannot take other attributes. Subclasses
+    that don't define ``__slots__`` themselves can.
+
+    The child containers and the geometry are built from :attr:`ipc_data`
+    when they are first used. The root of a tree keeps indexes for the
+    ``find_*`` methods, which are built on the first lookup. They are
+    dropped when ``nodes`` or ``floating_nodes`` is assigned; call
+    :func:`invalidate_index` after changing these lists in place.
+
     .. seealso:: https://i3wm.org/docs/ipc.html#_tree_reply
 
     :ivar border:
@@ -85,21 +101,58 @@ class Con:
     :ivar ipc_data: The raw data from the i3 ipc.
     :vartype ipc_data: dict
     """
+    __slots__ = (
+        'ipc_data', '_conn', 'parent',
+        'border', 'current_border_width', 'floating', 'focus', 'focused',
+        'focused_seats', 'fullscreen_mode', 'id', 'layout', 'marks',
+        'name', 'num', 'orientation', 'percent', 'scratchpad_state',
+        'shell', 'sticky', 'type', 'urgent', 'window', 'pid', 'app_id',
+        'representation', 'visible', 'most_recent_seat',
+        '_nodes', '_floating_nodes',
+        'window_class', 'window_instance', 'window_role', 'window_title',
+        '_rect', '_window_rect', '_deco_rect', '_geometry', '_gaps',
+        '_index', '__weakref__',
+    )
+
     def __init__(self, data, parent, conn, floats=False):
         self.ipc_data = data
         self._conn = conn
         self.parent = parent
+        self._set_properties(data, floats)
+
+        # the complex properties are built when they are used
+        self._nodes = _unset
+        self._floating_nodes = _unset
+        self._index = None
 
+    def _set_properties(self, data, floats):
         # set simple properties
-        ipc_properties = [
-	    'border', 'current_border_width', 'floating', 'focus', 'focused',
-	    'focused_seats', 'fullscreen_mode', 'id', 'layout', 'marks',
-	    'name', 'num', 'orientation', 'percent', 'scratchpad_state',
-	    'shell', 'sticky', 'type', 'urgent', 'window', 'pid', 'app_id',
-	    'representation', 'visible', 'most_recent_seat',
-        ]
-        for attr in ipc_properties:
-            setattr(self, attr, data.get(attr))
+        get = data.get
+        self.border = get('border')
+        self.current_border_width = get('current_border_width')
+        self.floating = get('floating')
+        self.focus = get('focus')
+        self.focused = get('focused')
+        self.focused_seats = get('focused_seats')
+        self.fullscreen_mode = get('fullscreen_mode')
+        self.id = get('id')
+        self.layout = get('layout')
+        self.marks = get('marks')
+        self.name = get('name')
+        self.num = get('num')
+        self.orientation = get('orientation')
+        self.percent = get('percent')
+        self.scratchpad_state = get('scratchpad_state')
+        self.shell = get('shell')
+        self.sticky = get('sticky')
+        self.type = get('type')
+        self.urgent = get('urgent')
+        self.window = get('window')
+        self.pid = get('pid')
+        self.app_id = get('app_id')
+        self.representation = get('representation')
+        self.visible = get('visible')
+        self.most_recent_seat = get('most_recent_seat')
         if self.floating is None:
             self.floating = floats
 
@@ -122,46 +175,123 @@ class Con:
             elif self.type == 5:
                 self.type = "dockarea"
 
-        # set complex properties
-        self.nodes = []
-        if 'nodes' in data:
-            for n in data['nodes']:
-                self.nodes.append(self.__class__(n, self, conn))
-
-        self.floating_nodes = []
-        if 'floating_nodes' in data:
-            for n in data['floating_nodes']:
-                self.floating_nodes.append(self.__class__(n, self, conn, floats=True))
-
-        self.window_class = None
-        self.window_instance = None
-        self.window_role = None
-        self.window_title = None
-        if 'window_properties' in data:
-            if 'class' in data['window_properties']:
-                self.window_class = data['window_properties']['class']
-            if 'instance' in data['window_properties']:
-                self.window_instance = data['window_properties']['instance']
-            if 'window_role' in data['window_properties']:
-                self.window_role = data['window_properties']['window_role']
-            if 'title' in data['window_properties']:
-                self.window_title = data['window_properties']['title']
-
-        self.rect = Rect(data['rect'])
-        if 'window_rect' in data:
-            self.window_rect = Rect(data['window_rect'])
-
-        self.deco_rect = None
-        if 'deco_rect' in data:
-            self.deco_rect = Rect(data['deco_rect'])
-
-        self.geometry = None
-        if 'geometry' in data:
-            self.geometry = Rect(data['geometry'])
-
-        self.gaps = None
-        if 'gaps' in data:
-            self.gaps = Gaps(data['gaps'])
+        props = get('window_properties')
+        if props is not None:
+            props = props.get
+            self.window_class = props('class')
+            self.window_instance = props('instance')
+            self.window_role = props('window_role')
+            self.window_title = props('title')
+        else:
+            self.window_class = None
+            self.window_instance = None
+            self.window_role = None
+            self.window_title = None
+
+        self._rect = _unset
+        self._window_rect = _unset
+        self._deco_rect = _unset
+        self._geometry = _unset
+        self._gaps = _unset
+
+    def _update(self, data):
+        # takes over the properties of newer ipc data for this container,
+        # except for its children
+        indexed = self._indexed_properties()
+        ipc_data = self.ipc_data
+        for key, value in data.items():
+            if key not in ('nodes', 'floating_nodes'):
+                ipc_data[key] = value
+        self._set_properties(ipc_data, self.floating)
+        if self._indexed_properties() != indexed:
+            self.invalidate_index()
+
+    def _indexed_properties(self):
+        return self.id, self.window, self.pid, self.type, bool(self.marks)
+
+    @property
+    def nodes(self) -> List['Con']:
+        nodes = self._nodes
+        if nodes is _unset:
+            cls, conn = self.__class__, self._conn
+            self._nodes = nodes = [cls(n, self, conn) for n in self.ipc_data.get('nodes', ())]
+        return nodes
+
+    @nodes.setter
+    def nodes(self, nodes: List['Con']):
+        self._nodes = nodes
+        self.invalidate_index()
+
+    @property
+    def floating_nodes(self) -> List['Con']:
+        nodes = self._floating_nodes
+        if nodes is _unset:
+            cls, conn = self.__class__, self._conn
+            self._floating_nodes = nodes = [
+                cls(n, self, conn, floats=True) for n in self.ipc_data.get('floating_nodes', ())
+            ]
+        return nodes
+
+    @floating_nodes.setter
+    def floating_nodes(self, nodes: List['Con']):
+        self._floating_nodes = nodes
+        self.invalidate_index()
+
+    @property
+    def rect(self) -> Rect:
+        rect = self._rect
+        if rect is _unset:
+            self._rect = rect = Rect(self.ipc_data['rect'])
+        return rect
+
+    @rect.setter
+    def rect(self, rect: Rect):
+        self._rect = rect
+
+    @property
+    def window_rect(self) -> Optional[Rect]:
+        rect = self._window_rect
+        if rect is _unset:
+            self._window_rect = rect = _rect(self.ipc_data.get('window_rect'))
+        return rect
+
+    @window_rect.setter
+    def window_rect(self, rect: Optional[Rect]):
+        self._window_rect = rect
+
+    @property
+    def deco_rect(self) -> Optional[Rect]:
+        rect = self._deco_rect
+        if rect is _unset:
+            self._deco_rect = rect = _rect(self.ipc_data.get('deco_rect'))
+        return rect
+
+    @deco_rect.setter
+    def deco_rect(self, rect: Optional[Rect]):
+        self._deco_rect = rect
+
+    @property
+    def geometry(self) -> Optional[Rect]:
+        rect = self._geometry
+        if rect is _unset:
+            self._geometry = rect = _rect(self.ipc_data.get('geometry'))
+        return rect
+
+    @geometry.setter
+    def geometry(self, rect: Optional[Rect]):
+        self._geometry = rect
+
+    @property
+    def gaps(self) -> Optional[Gaps]:
+        gaps = self._gaps
+        if gaps is _unset:
+            data = self.ipc_data.get('gaps')
+            self._gaps = gaps = None if data is None else Gaps(data)
+        return gaps
+
+    @gaps.setter
+    def gaps(self, gaps: Optional[Gaps]):
+        self._gaps = gaps
 
     def __iter__(self):
         """Iterate through the descendents of this node (breadth-first tree traversal)
@@ -175,6 +305,96 @@ class Con:
             queue.extend(con.nodes)
             queue.extend(con.floating_nodes)
 
+    def _tree_index(self) -> '_TreeIndex':
+        root = self.root()
+        index = root._index
+        if index is None:
+            root._index = index = _TreeIndex(root)
+        return index
+
+    def invalidate_index(self):
+        """Drops the lookup indexes of this tree, so that they are rebuilt
+        on the next lookup. This is needed after the ``nodes`` or
+        ``floating_nodes`` of a container in the tree have been changed in
+        place.
+        """
+        self.root()._index = None
+
+    def _has_descendant(self, con: Optional['Con']) -> bool:
+        if con is None:
+            return False
+        if self.parent is None:
+            # the index of a root holds its descendants only
+            return True
+        parent = con.parent
+        while parent is not None:
+            if parent is self:
+                return True
+            parent = parent.parent
+        return False
+
+    @staticmethod
+    def diff(old: 'Con', new: 'Con') -> 'TreeDiff':
+        """Compares two snapshots of a tree. Containers are matched by their
+        id; the roots themselves are not compared.
+
+        :Example:
+
+        .. code-block:: python3
+
+            old = await wm.get_tree()
+            ...
+            diff = Con.diff(old, await wm.get_tree())
+            for before, after in diff.retitled:
+                print(f'{before.name} => {after.name}')
+
+        :returns: The changes from ``old`` to ``new``.
+        :rtype: :class:`TreeDiff`
+        """
+        old_ids, old_workspaces = old._descendants_by_id()
+        new_ids, new_workspaces = new._descendants_by_id()
+        diff = TreeDiff()
+
+        for id, after in new_ids.items():
+            before = old_ids.get(id)
+            if before is None:
+                diff.added.append(after)
+                continue
+            pair = (before, after)
+            if (_parent_id(before) != _parent_id(after)
+                    or old_workspaces.get(id) != new_workspaces.get(id)):
+                diff.moved.append(pair)
+            if before.name != after.name or before.window_title != after.window_title:
+                diff.retitled.append(pair)
+            if before.focused != after.focused:
+                diff.refocused.append(pair)
+            if _rect_tuple(before.rect) != _rect_tuple(after.rect):
+                diff.resized.append(pair)
+            if before.marks != after.marks:
+                diff.remarked.append(pair)
+            if before.is_floating() != after.is_floating():
+                diff.floating.append(pair)
+
+        diff.removed = [con for id, con in old_ids.items() if id not in new_ids]
+        return diff
+
+    def _descendants_by_id(self):
+        # the descendants by id, and the id of the workspace each one is on
+        if self.parent is None:
+            ids = self._tree_index().by_id
+        else:
+            ids = {}
+            for con in self:
+                ids.setdefault(con.id, con)
+        workspaces = {}
+        for id, con in ids.items():
+            # breadth-first, so the parent comes first
+            if con.type == 'workspace':
+                workspaces[id] = id
+            else:
+                workspaces[id] = workspaces.get(_parent_id(con))
+        return ids, workspaces
+
     def is_floating(self) -> bool:
         """A boolean value of whether this is a floating node.
 
@@ -262,10 +482,25 @@ class Con:
     def find_focused(self) -> Optional['Con']:
         """Finds the focused container under this container if it exists.
 
+        The focus stacks are followed down from this container, so only the
+        containers on the way there are built. If that does not lead to the
+        focused container (e.g. the tree has no focus stacks, or the focus
+        is elsewhere), the whole subtree is searched.
+
         :returns: The focused container if it exists.
         :rtype: :class:`Con` or :class:`None` if the focused container is not
             under this container
         """
+        con = self
+        while con.focus:
+            child = next((c for c in con.nodes + con.floating_nodes if c.id == con.focus[0]),
+                         None)
+            if child is None:
+                break
+            if child.focused:
+                return child
+            con = child
+
         try:
             return next(c for c in self if c.focused)
         except StopIteration:
@@ -278,10 +513,8 @@ class Con:
         :rtype: :class:`Con` or :class:`None` if there is no container with
             this container id.
         """
-        try:
-            return next(c for c in self if c.id == id)
-        except StopIteration:
-            return None
+        con = self._tree_index().by_id.get(id)
+        return con if self._has_descendant(con) else None
 
     def find_by_pid(self, pid: int) -> List['Con']:
         """Finds all the containers under this node with this pid.
@@ -289,7 +522,7 @@ class Con:
         :returns: A list of containers with this pid.
         :rtype: list(:class:`Con`)
         """
-        return [c for c in self if c.pid == pid]
+        return [c for c in self._tree_index().by_pid.get(pid, ()) if self._has_descendant(c)]
 
     def find_by_window(self, window: int) -> Optional['Con']:
         """Finds a container with the given window id under this node.
@@ -298,10 +531,8 @@ class Con:
         :rtype: :class:`Con` or :class:`None` if there is no container with
             this window id.
         """
-        try:
-            return next(c for c in self if c.window == window)
-        except StopIteration:
-            return None
+        con = self._tree_index().by_window.get(window)
+        return con if self._has_descendant(con) else None
 
     def find_by_role(self, pattern: str) -> List['Con']:
         """Finds all the containers under this node with a window role that
@@ -365,7 +596,10 @@ class Con:
         :rtype: list(:class:`Con`)
         """
         pattern = re.compile(pattern)
-        return [c for c in self if any(pattern.search(mark) for mark in c.marks)]
+        return [
+            c for c in self._tree_index().marked
+            if any(pattern.search(mark) for mark in c.marks) and self._has_descendant(c)
+        ]
 
     def find_fullscreen(self) -> List['Con']:
         """Finds all the containers under this node that are in fullscreen
@@ -374,7 +608,10 @@ class Con:
         :returns: A list of fullscreen containers.
         :rtype: list(:class:`Con`)
         """
-        return [c for c in self if c.type == 'con' and c.fullscreen_mode]
+        return [
+            c for c in self._tree_index().by_type.get('con', ())
+            if c.fullscreen_mode and self._has_descendant(c)
+        ]
 
     def workspace(self) -> Optional['Con']:
         """Finds the workspace container for this node if this container is at
@@ -402,8 +639,8 @@ class Con:
         :returns: The scratchpad container.
         :rtype: class:`Con`
         """
-        for con in self.root():
-            if con.type == 'workspace' and con.name == "__i3_scratch":
+        for con in self._tree_index().by_type.get('workspace', ()):
+            if con.name == "__i3_scratch":
                 return con
 
         return None
@@ -438,3 +675,74 @@ class Con:
         return await self._conn.command(' '.join(commands))
 
 
+def _parent_id(con: Con) -> Optional[int]:
+    return None if con.parent is None else con.parent.id
+
+
+def _rect_tuple(rect: Optional[Rect]):
+    return None if rect is None else (rect.x, rect.y, rect.width, rect.height)
+
+
+class TreeDiff:
+    """The changes between two snapshots of a tree, as computed by
+    :func:`Con.diff() <asway.Con.diff>`. Each list is in breadth-first order.
+    Changed containers are listed as ``(old, new)`` pairs and may be in
+    several lists.
+
+    :ivar added: The containers that are only in the new tree.
+    :vartype added: list(:class:`Con`)
+    :ivar removed: The containers that are only in the old tree.
+    :vartype removed: list(:class:`Con`)
+    :ivar moved: The containers with another parent or on another workspace.
+    :vartype moved: list(tuple(:class:`Con`, :class:`Con`))
+    :ivar retitled: The containers with another name or window title.
+    :vartype retitled: list(tuple(:class:`Con`, :class:`Con`))
+    :ivar refocused: The containers that gained or lost the focus.
+    :vartype refocused: list(tuple(:class:`Con`, :class:`Con`))
+    :ivar resized: The containers with another position or size.
+    :vartype resized: list(tuple(:class:`Con`, :class:`Con`))
+    :ivar remarked: The containers with other marks.
+    :vartype remarked: list(tuple(:class:`Con`, :class:`Con`))
+    :ivar floating: The containers that started or stopped floating.
+    :vartype floating: list(tuple(:class:`Con`, :class:`Con`))
+    """
+    __slots__ = ('added', 'removed', 'moved', 'retitled', 'refocused', 'resized', 'remarked',
+                 'floating')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, [])
+
+    def __bool__(self):
+        return any(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        counts = ', '.join(f'{name}={len(getattr(self, name))}' for name in self.__slots__)
+        return f'<TreeDiff {counts}>'
+
+
+class _TreeIndex:
+    """The containers of a tree by id, window, pid and type, and those that
+    have marks, each in breadth-first order. The root itself is not part of
+    it.
+    """
+    __slots__ = ('by_id', 'by_window', 'by_pid', 'by_type', 'marked')
+
+    def __init__(self, root: Con):
+        by_id = {}
+        by_window = {}
+        by_pid = {}
+        by_type = {}
+        marked = []
+        for con in root:
+            by_id.setdefault(con.id, con)
+            by_window.setdefault(con.window, con)
+            by_pid.setdefault(con.pid, []).append(con)
+            by_type.setdefault(con.type, []).append(con)
+            if con.marks:
+                marked.append(con)
+        self.by_id = by_id
+        self.by_window = by_window
+        self.by_pid = by_pid
+        self.by_type = by_type
+        self.marked = marked
@@ -1,100 +1,473 @@
-from ._private import pubsub, MessageType, EventType, Synchronizer
+from ._private import PubSub, MessageType, EventType, Synchronizer
+from ._private.codec import get_loads
+from ._private.framing import FrameReader, pack
+from ._private.queue import EventQueue
+from ._private.dispatch import Coalescer, dispatcher
 from .replies import (BarConfigReply, CommandReply, ConfigReply, OutputReply, TickReply,
                        VersionReply, WorkspaceReply, SeatReply, InputReply)
 from .events import (IpcBaseEvent, BarconfigUpdateEvent, BindingEvent, OutputEvent, ShutdownEvent,
-                      WindowEvent, TickEvent, ModeEvent, WorkspaceEvent, InputEvent, Event)
+                     WindowEvent, TickEvent, ModeEvent, WorkspaceEvent, InputEvent, SeatEvent,
+                     BarStateUpdateEvent, ConnectionEvent, Event)
 from .con import Con
-from inspect import iscoroutine
+from .mirror import TreeMirror
 import os
 import json
-from typing import Optional, List, Tuple, Callable, Union
+from typing import Optional, List, Tuple, Callable, Union, Iterator
 from contextlib import asynccontextmanager
-import struct
-import socket
+from collections import deque
+from operator import attrgetter
+import re
+import stat
+import random
 import logging
 
 import anyio
-from anyio.streams.buffered import BufferedByteReceiveStream
-from subprocess import PIPE
-import sys
-
-_MAGIC = b'i3-ipc'  # safety string for i3-ipc
-_chunk_size = 1024  # in bytes
-_struct_header = f'={len(_MAGIC)}sII'
-_struct_header_size = struct.calcsize(_struct_header)
+
 _running_futures = set()
+# sway and i3 send the "change" member of an event first
+_change_re = re.compile(rb'\s*\{\s*"change"\s*:\s*"([^"\\]*)"')
+# sway-ipc.<uid>.<pid>.sock, i3's ipc-socket.<pid>
+_socket_pid_re = re.compile(r'^(?:sway-ipc\.\d+\.|ipc-socket\.)(\d+)(?:\.sock)?$')
 
 logger = logging.getLogger(__name__)
 
+# retrying to connect does not help with these
+_fatal_connect_errors = (RuntimeError, PermissionError)
+
+# what a broken or closed socket raises
+_connection_errors = (OSError, anyio.EndOfStream, anyio.BrokenResourceError,
+                      anyio.ClosedResourceError)
+
+
+def _peek_change(data: bytes) -> Optional[str]:
+    """Gets the "change" member of a raw event without decoding it.
+
+    :returns: The change, or ``None`` if it cannot be found cheaply.
+    """
+    m = _change_re.match(data)
+    if m is None:
+        return None
+    return m.group(1).decode('utf-8', 'surrogateescape')
+
+
+def _raw_event_type(event_type: EventType) -> int:
+    """The message type of an event as sent by sway/i3."""
+    return (1 << 31) | (event_type.value.bit_length() - 1)
+
+
+_tick_event_type = _raw_event_type(EventType.TICK)
+
+# message type => (event name, decoder)
+_event_decoders = {
+    _raw_event_type(event_type): (event_type.to_string(), decoder)
+    for event_type, decoder in (
+        (EventType.WORKSPACE, lambda data, conn: WorkspaceEvent(data, conn, _Con=Con)),
+        (EventType.OUTPUT, lambda data, conn: OutputEvent(data)),
+        (EventType.MODE, lambda data, conn: ModeEvent(data)),
+        (EventType.WINDOW, lambda data, conn: WindowEvent(data, conn, _Con=Con)),
+        (EventType.BARCONFIG_UPDATE, lambda data, conn: BarconfigUpdateEvent(data)),
+        (EventType.BINDING, lambda data, conn: BindingEvent(data)),
+        (EventType.SHUTDOWN, lambda data, conn: ShutdownEvent(data)),
+        (EventType.TICK, lambda data, conn: TickEvent(data)),
+        (EventType.SEAT, lambda data, conn: SeatEvent(data)),
+        (EventType.BAR_STATE_UPDATE, lambda data, conn: BarStateUpdateEvent(data)),
+        (EventType.INPUT, lambda data, conn: InputEvent(data)),
+    )
+}
+
+
+class ReconnectPolicy:
+    """How :class:`Connection` retries connecting to sway/i3.
+
+    The first attempt happens at once. Retry ``n`` (counting from zero)
+    waits ``min(initial_delay * factor ** n, max_delay)`` seconds, varied
+    randomly by up to ``jitter`` times that delay.
+
+    :param initial_delay: The delay before the first retry, in seconds.
+    :type initial_delay: float
+    :param max_delay: The longest delay between two attempts, in seconds.
+    :type max_delay: float
+    :param factor: How much the delay grows after each retry.
+    :type factor: float
+    :param jitter: The random variation of each delay, as a fraction of it.
+    :type jitter: float
+    :param max_tries: The number of retries before giving up, or
+        :class:`None` to retry forever.
+    :type max_tries: int
+    """
+    def __init__(self,
+                 initial_delay: float = 0.01,
+                 max_delay: float = 2.0,
+                 factor: float = 2.0,
+                 jitter: float = 0.1,
+                 max_tries: Optional[int] = 10):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.max_tries = max_tries
+
+    @classmethod
+    def unlimited(cls, **kw) -> 'ReconnectPolicy':
+        """A policy that never gives up."""
+        return cls(max_tries=None, **kw)
+
+    def delays(self) -> Iterator[float]:
+        """The delays before each retry."""
+        delay = self.initial_delay
+        tries = 0
+        while self.max_tries is None or tries < self.max_tries:
+            yield delay * (1 + random.uniform(-self.jitter, self.jitter))
+            delay = min(delay * self.factor, self.max_delay)
+            tries += 1
+
+
+class _Reply:
+    """A reply slot for a request sent on a pipelined socket. The reader task
+    of the socket fills in the result.
+    """
+    __slots__ = ('message_type', 'event', 'data', 'error')
+
+    def __init__(self, message_type: MessageType):
+        self.message_type = message_type
+        self.event = anyio.Event()
+        self.data = None
+        self.error = None
+
+    def set(self, data):
+        self.data = data
+        self.event.set()
+
+    def fail(self, error: Exception):
+        self.error = error
+        self.event.set()
 
-from blinker import Signal as _Signal, ANY
+    async def get(self):
+        await self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.data
 
-class NotGiven:
-    pass
+    def __await__(self):
+        return self.get().__await__()
 
-class Signal(pubsub.Signal):
-    async def send(self, tg, data=NotGiven):
-        """Emit this signal on behalf of *sender*, passing on ``data``.
+
+class _SubscriptionSwitch:
+    """A replacement subscription socket that takes over at the tick with the
+    ``marker`` payload.
+    """
+    def __init__(self, marker: str, sock, reader: FrameReader, events: set):
+        self.marker = marker
+        self.sock = sock
+        self.reader = reader
+        self.events = events
+        self.done = anyio.Event()
+        self.error = None
+
+    def finish(self, error: Optional[Exception] = None):
+        self.error = error
+        self.done.set()
+
+
+class _CommandChannel:
+    """A command socket.
+
+    In lock-step mode each request holds the socket until its reply has been
+    read. In pipelined mode requests are written back to back without waiting
+    for the previous reply; sway/i3 answers the requests of a socket in
+    order, so the reader task (:meth:`run`) hands each reply to the oldest
+    waiting request.
+
+    ``busy`` counts the requests that are in flight or waiting for the
+    socket.
+    """
+    def __init__(self, sock, pipeline: bool = False):
+        self.sock = sock
+        self.reader = FrameReader(sock)
+        self.pipeline = pipeline
+        self.wlock = anyio.Lock()
+        self.pending = deque()
+        self.busy = 0
+        self.skip = 0
+        self.error = None
+
+    async def request(self, message_type: MessageType, payload: str = '') -> bytearray:
+        if self.error is not None:
+            raise self.error
+
+        self.busy += 1
+        try:
+            if self.pipeline:
+                return await self._request_p(message_type, payload)
+            async with self.wlock:
+                return await self._request_l(message_type, payload)
+        finally:
+            self.busy -= 1
+
+    async def _request_l(self, message_type: MessageType, payload: str) -> bytearray:
+        # drop the replies of requests that got cancelled while waiting
+        while self.skip:
+            await self._read_reply()
+            self.skip -= 1
+
+        try:
+            await self.sock.send(pack(message_type.value, payload))
+        except Exception as e:
+            self.error = e
+            raise
+        try:
+            reply_type, message = await self._read_reply()
+        except anyio.get_cancelled_exc_class():
+            self.skip += 1
+            raise
+        except Exception as e:
+            self.error = e
+            raise
+
+        if reply_type != message_type.value:
+            self.error = RuntimeError(f'unexpected reply: expected {message_type}, '
+                                      f'got type {reply_type}')
+            raise self.error
+        return message
+
+    async def _request_p(self, message_type: MessageType, payload: str) -> bytearray:
+        reply = _Reply(message_type)
+        async with self.wlock:
+            # queue the reply slot first: the reader may see the answer
+            # before ``send`` returns
+            self.pending.append(reply)
+            try:
+                await self.sock.send(pack(message_type.value, payload))
+            except BaseException:
+                try:
+                    self.pending.remove(reply)
+                except ValueError:
+                    pass
+                raise
+
+        return await reply.get()
+
+    async def _read_reply(self) -> Tuple[int, bytes]:
+        reply_type, message = await self.reader.receive()
+        # the caller decodes the reply after the reader has moved on
+        message = bytes(message)
+        logger.info('got message reply: %s', message)
+        return reply_type, message
+
+    async def run(self):
+        """The reader task of a pipelined channel."""
+        try:
+            while True:
+                reply_type, message = await self._read_reply()
+                reply = self.pending.popleft()
+                if reply_type != reply.message_type.value:
+                    raise RuntimeError(f'reply out of order: expected {reply.message_type}, '
+                                       f'got type {reply_type}')
+                reply.set(message)
+
+        except Exception as e:
+            # Callers see the error. Later requests on this channel fail
+            # immediately, so a reconnect can replace it.
+            logger.info('command socket failed', exc_info=e)
+            self.error = e
+            while self.pending:
+                self.pending.popleft().fail(e)
+
+    async def aclose(self):
+        await self.sock.aclose()
+
+
+def _count_commands(cmd: str) -> int:
+    """Counts the commands in a command string, i.e. the number of replies
+    sway/i3 sends for it. Commands are separated by ``;`` or ``,`` outside of
+    quotes and criteria.
+    """
+    count = 0
+    seen = False
+    quote = None
+    escaped = False
+    depth = 0
+    for ch in cmd:
+        if escaped:
+            escaped = False
+        elif quote is not None:
+            if ch == '\\':
+                escaped = True
+            elif ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth = max(depth - 1, 0)
+        elif depth == 0 and ch in ';,':
+            count += seen
+            seen = False
+            continue
+        if not ch.isspace():
+            seen = True
+    return count + seen
+
+
+class _CommandBatch:
+    """Commands that are sent to sway/i3 as a single ``RUN_COMMAND`` message.
+
+    Use :func:`Connection.batch() <asway.Connection.batch>` to get one.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+        self._items = []
+
+    def command(self, cmd: str) -> _Reply:
+        """Adds a command to the batch.
+
+        :param cmd: The command to send to sway/i3.
+        :type cmd: str
+        :returns: An awaitable for the list of replies to this command. It
+            resolves when the batch has been sent.
         """
-        receivers= list(self.receivers_for(None))
-        if not receivers:
+        reply = _Reply(MessageType.COMMAND)
+        self._items.append((cmd.strip().rstrip(';').rstrip(), reply))
+        return reply
+
+    async def flush(self):
+        """Sends the commands collected so far."""
+        items, self._items = self._items, []
+        if not items:
             return
 
-        async def mas(p,*a):
-            r = p(*a)
-            if iscoroutine(r):
-                await r
+        payload = '; '.join(cmd for cmd, _ in items if cmd)
+        try:
+            replies = await self._conn._command(payload) if payload else []
+        except Exception as e:
+            for _, reply in items:
+                reply.fail(e)
+            raise
 
-        if len(receivers) == 1:
-            if data is NotGiven:
-                await mas(receivers[0])
+        counts = [_count_commands(cmd) for cmd, _ in items]
+        expected = sum(counts)
+        if expected != len(replies):
+            logger.warning('batched commands: expected %d replies, got %d', expected,
+                           len(replies))
+            reason = f'expected {expected} replies to the batch, got {len(replies)}'
+            if replies and replies[-1].error:
+                reason += f'; the last one failed: {replies[-1].error}'
+        pos = 0
+        for (cmd, reply), n in zip(items, counts):
+            # sway stops at the first command that fails; with more replies
+            # than expected, none of them can be matched to their commands
+            if pos + n > len(replies) or len(replies) > expected:
+                reply.fail(RuntimeError(f'command {cmd!r} did not run in full: {reason}'))
             else:
-                await mas(receivers[0], data)
-            return
+                reply.set(replies[pos:pos + n])
+            pos += n
 
-        else:
-            if data is NotGiven:
-                for rec in receivers:
-                    tg.start_soon(mas, rec)
-            else:
-                for rec in receivers:
-                    tg.start_soon(mas, rec, data)
-
-
-class PubSub(pubsub.PubSub):
-    def _signal(self, name):
-        return Signal(name)
-
-    async def emit(self, event, data=NotGiven):
-        detail = ''
-        if data and hasattr(data, 'change'):
-            detail = data.change
-
-        sigs = []
-        sig = self._subscriptions.get((event,''))
-        if sig is not None:
-            sigs.append(sig)
-        if detail:
-            sig = self._subscriptions.get((event,detail))
-            if sig is not None:
-                sigs.append(sig)
-        if not sigs:
-            return
-        if len(sigs) == 1:
-            await sigs[0].send(self._tg, data)
-        else:
-            for sig in sigs:
-                self._tg.start_soon(sig.send, self._tg, data)
+
+def _is_live_socket(path: str) -> bool:
+    """Checks that ``path`` is a socket of this user and, if its name
+    contains the pid of the window manager, that this process still runs.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    # other users can create sockets in /tmp
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return False
+
+    m = _socket_pid_re.search(os.path.basename(path))
+    if m is not None:
+        try:
+            os.kill(int(m.group(1)), 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            # e.g. EPERM: the process exists
+            pass
+    return True
+
+
+def _socket_cache_file() -> Optional[str]:
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        return None
+    # several sessions of the same user share the runtime directory
+    display = os.environ.get('WAYLAND_DISPLAY') or os.environ.get('DISPLAY')
+    name = 'asway-socket'
+    if display:
+        name += '.' + display.replace('/', '_')
+    return os.path.join(runtime_dir, name)
+
+
+def _read_socket_cache() -> Optional[str]:
+    cache_file = _socket_cache_file()
+    if cache_file is None:
+        return None
+    try:
+        with open(cache_file) as f:
+            socket_path = f.read().strip()
+    except OSError:
+        return None
+    if socket_path and _is_live_socket(socket_path):
+        return socket_path
+    return None
 
 
-def _pack(msg_type: MessageType, payload: str) -> bytes:
-    pb = payload.encode()
-    s = struct.pack('=II', len(pb), msg_type.value)
-    return b''.join((_MAGIC, s, pb))
+def _write_socket_cache(socket_path: str):
+    cache_file = _socket_cache_file()
+    if cache_file is None:
+        return
+    tmp_file = f'{cache_file}.{os.getpid()}'
+    try:
+        with open(tmp_file, 'w') as f:
+            f.write(socket_path)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.info('could not write the socket path cache %s', cache_file, exc_info=e)
 
 
-def _unpack_header(data: bytes) -> Tuple[bytes, int, int]:
-    return struct.unpack(_struct_header, data[:_struct_header_size])
+def _scan_socket_paths(try_i3: bool = False) -> List[str]:
+    """Looks for sockets in the places sway and i3 create them by default.
+
+    :returns: The live sockets, those in ``$XDG_RUNTIME_DIR`` first and the
+        temporary directory last, the most recently created first within a
+        directory.
+    """
+    # only needed when the environment does not name the socket
+    import glob
+    import tempfile
+
+    uid = os.getuid()
+    tmp_dir = tempfile.gettempdir()
+    dirs = [os.environ.get('XDG_RUNTIME_DIR'), f'/run/user/{uid}', tmp_dir]
+    found = []
+    for d in dict.fromkeys(filter(None, dirs)):
+        patterns = [os.path.join(d, f'sway-ipc.{uid}.*.sock')]
+        if try_i3:
+            patterns.append(os.path.join(d, 'i3', 'ipc-socket.*'))
+            if d == tmp_dir:
+                patterns.append(os.path.join(d, 'i3-*', 'ipc-socket.*'))
+
+        paths = []
+        for pattern in patterns:
+            for path in glob.glob(pattern):
+                if _is_live_socket(path):
+                    paths.append((os.stat(path).st_mtime, path))
+        found.extend(path for _, path in sorted(paths, reverse=True))
+    if len(found) > 1:
+        logger.info('found several sockets: %s', found)
+    return found
+
+
+async def _can_connect(socket_path: str) -> bool:
+    # a socket left behind by a window manager whose pid was reused
+    try:
+        sock = await anyio.connect_unix(socket_path)
+    except OSError:
+        return False
+    await sock.aclose()
+    return True
 
 
 async def _find_socket_path(try_i3: bool = False) -> Optional[str]:
@@ -122,6 +495,19 @@ async def _find_socket_path(try_i3: bool = False) -> Optional[str]:
             if exists(socket_path):
                 return socket_path
 
+    # then the result of an earlier search
+    socket_path = _read_socket_cache()
+    if socket_path and await _can_connect(socket_path):
+        logger.info('got socket path from cache: %s', socket_path)
+        return socket_path
+
+    # then the default locations
+    for socket_path in _scan_socket_paths(try_i3):
+        if await _can_connect(socket_path):
+            logger.info('found socket path: %s', socket_path)
+            _write_socket_cache(socket_path)
+            return socket_path
+
     # finally try the binaries
     for binary in ('sway', 'i3'):
         if binary == 'i3' and not try_i3:
@@ -131,6 +517,7 @@ async def _find_socket_path(try_i3: bool = False) -> Optional[str]:
             socket_path = result.stdout.decode().strip()
             logger.info('got socket path from %r binary: %s', binary, socket_path)
             if exists(socket_path):
+                _write_socket_cache(socket_path)
                 return socket_path
         except Exception as e:
             logger.info('could not get socket path from %r binary', binary, exc_info=e)
@@ -157,25 +544,119 @@ class Connection:
             await wm.command('focus left')
 
     :param socket_path: A path to the sway/i3 ipc socket path to connect to. If not
-        given, find the socket path through the default search path.
+        given, find the socket path through the default search path: the
+        ``SWAYSOCK`` environment variable, the path found by an earlier
+        search (cached in ``$XDG_RUNTIME_DIR``), the default socket
+        locations, and finally ``sway --get-socketpath``.
     :type socket_path: str
     :param auto_reconnect: Whether to attempt to reconnect if the connection to
         the socket is broken when sway/i3 restarts.
     :type auto_reconnect: bool
-
-    :raises RuntimeError: If the connection to sway/i3 cannot be established.
+    :param pipeline: Whether to pipeline requests on the command socket.
+        Concurrent requests are then sent back to back instead of waiting for
+        the previous reply; the replies are matched to the requests in order.
+    :type pipeline: bool
+    :param command_sockets: The number of command sockets to open. Each
+        request goes to the socket with the fewest requests in flight, so a
+        large reply (e.g. ``GET_TREE``) does not delay a quick command.
+    :type command_sockets: int
+    :param batch_commands: Whether to merge the commands that are issued
+        within the same scheduler tick into a single message. Each caller
+        still gets the replies for its own commands; see :func:`batch()` for
+        what happens when one of them fails.
+    :type batch_commands: bool
+    :param reconnect_policy: How often and how fast to retry connecting,
+        initially and (with ``auto_reconnect``) when the connection is lost.
+        Requests issued while reconnecting wait for the new connection. A
+        missing socket path or a permission error is not retried.
+    :type reconnect_policy: :class:`ReconnectPolicy`
+    :param connect_timeout: How many seconds :func:`connect()`, including
+        the retries, may take before :class:`TimeoutError` is raised.
+        ``None`` means no limit. Reconnecting is limited by the
+        ``reconnect_policy`` only.
+    :type connect_timeout: float
+    :param event_queue_size: How many events may wait between reading them
+        from the socket and running their handlers, so that slow handlers
+        don't stop the socket from being drained.
+    :type event_queue_size: int
+    :param event_overflow: What to do with a new event when the queue is
+        full: ``"block"`` (wait for room), ``"drop_oldest"``, or
+        ``"coalesce"`` (replace a queued window or workspace event with the
+        same change for the same container, else wait).
+    :type event_overflow: str
+    :param json_backend: The JSON decoder to use: ``"msgspec"``, ``"orjson"``
+        or ``"json"``. If not given, use the fastest one that is installed.
+    :type json_backend: str
+    :param auto_compact: Whether :func:`off()` drops the subscriptions of
+        events that no handler is left for; see
+        :func:`compact_subscriptions()`.
+    :type auto_compact: bool
+    :param single_socket: Whether to send requests over the subscription
+        socket instead of separate command sockets. This halves the number of
+        sockets, and replies and events arrive in the order sway/i3 sent them.
+        Requests are pipelined; ``command_sockets`` and ``pipeline`` are
+        ignored. As replies are read along with the events, events that don't
+        fit in the event queue are held back in memory instead of waiting
+        for room, so handlers can make requests while the queue is full.
+    :type single_socket: bool
+
+    :raises RuntimeError: If the sway/i3 ipc socket cannot be found.
+    :raises ConnectionError: If connecting still fails after the retries.
+    :raises TimeoutError: If connecting takes longer than ``connect_timeout``.
     """
     _cmd_socket = None
     _sub_socket = None
-
-    def __init__(self, socket_path: Optional[str] = None, auto_reconnect: bool = False):
+    tg = None
+
+    def __init__(self,
+                 socket_path: Optional[str] = None,
+                 auto_reconnect: bool = False,
+                 pipeline: bool = False,
+                 command_sockets: int = 1,
+                 batch_commands: bool = False,
+                 reconnect_policy: Optional[ReconnectPolicy] = None,
+                 event_queue_size: int = 1024,
+                 event_overflow: str = 'block',
+                 json_backend: Optional[str] = None,
+                 auto_compact: bool = False,
+                 single_socket: bool = False,
+                 connect_timeout: Optional[float] = 2.0):
+        if command_sockets < 1:
+            raise ValueError('need at least one command socket')
         self._socket_path = socket_path
         self._auto_reconnect = auto_reconnect
+        self._pipeline = pipeline
+        self._n_cmd_sockets = 0 if single_socket else command_sockets
+        self._single_socket = single_socket
+        self._cmd_channels = ()
+        self._batch_commands = batch_commands
+        self._batch = None
+        self._event_decoders = dict(_event_decoders)
+        self._loads = get_loads(json_backend)
+        self._event_queue = EventQueue(event_queue_size, event_overflow)
+        # events that did not fit in the queue in single-socket mode
+        self._held_events = deque()
+        # handler => the wrappers on() put around it
+        self._wrappers = {}
         self._pubsub = PubSub(self)
         self._subscriptions = set()
+        # the requests on the subscription socket awaiting a reply
+        self._sub_replies = deque()
+        self._last_sub_reply = None
+        # events that on() wants subscribed with the next flush
+        self._sub_pending = set()
+        self._sub_flushed = None
+        self._sub_lock = anyio.Lock()
+        self._reading = False
+        self._switch = None
+        self._auto_compact = auto_compact
         self._main_future = None
         self._reconnect_event = None
         self._reconnect_error = None
+        self._reconnect_policy = reconnect_policy or ReconnectPolicy()
+        self._connect_timeout = connect_timeout
+        self._connect_error = None
+        self._connected = False
         self._synchronizer = None
         self._wlock = anyio.Lock()
 
@@ -202,70 +683,140 @@ class Connection:
         """
         return self._auto_reconnect
 
+    @property
+    def pipeline(self) -> bool:
+        """Whether this ``Connection`` pipelines requests on the command
+        socket.
+
+        :rtype: bool
+        """
+        return self._pipeline
+
+    @property
+    def command_sockets(self) -> int:
+        """The number of command sockets this ``Connection`` uses.
+
+        :rtype: int
+        """
+        return self._n_cmd_sockets
+
+    @property
+    def single_socket(self) -> bool:
+        """Whether this ``Connection`` sends requests over the subscription
+        socket.
+
+        :rtype: bool
+        """
+        return self._single_socket
+
+    @property
+    def dropped_events(self) -> int:
+        """The number of events dropped because the event queue was full.
+
+        :rtype: int
+        """
+        return self._event_queue.dropped
+
+    @property
+    def coalesced_events(self) -> int:
+        """The number of events that replaced an older queued event because
+        the event queue was full.
+
+        :rtype: int
+        """
+        return self._event_queue.coalesced
+
     async def _ipc_recv(self, sock):
         pass
 
+    def _start_reader(self):
+        if not self._reading:
+            self._reading = True
+            self.tg.start_soon(self._message_reader)
+
     async def _message_reader(self):
-        while True:
-            await self._read_message()
+        try:
+            while True:
+                await self._read_message()
+        finally:
+            self._reading = False
 
     async def _read_message(self):
 
-        error = None
-        buf = b''
         while True:
+            reader = self._sub_reader
             try:
-                buf = await self._sub_socket_buf.receive_exactly(_struct_header_size)
-            except ConnectionError as e:
+                event_type, raw_message = await reader.receive()
+            except _connection_errors as e:
+                if reader is not self._sub_reader:
+                    # replaced by a reconnect
+                    continue
                 if self._auto_reconnect:
-                    logger.info('could not read message, reconnecting', exc_info=error)
-                    await self._reconnect()
+                    logger.info('could not read message, reconnecting', exc_info=e)
+                    await self._reconnect(e)
                 else:
                     raise
             else:
                 break
 
-        magic, message_length, event_type = _unpack_header(buf)
-        assert magic == _MAGIC
-        raw_message = await self._sub_socket_buf.receive_exactly(message_length)
-        message = json.loads(raw_message.decode("utf-8","surrogateescape"))
-
         # events have the highest bit set
         if not event_type & (1 << 31):
-            # a reply
+            if self._sub_replies:
+                self._sub_replies.popleft().set(bytes(raw_message))
             return
 
-        event_type = EventType(1 << (event_type & 0x7f))
-        logger.info('got message on subscription socket: type=%s, message=%s', event_type,
-                    raw_message)
-
-        if event_type == EventType.WORKSPACE:
-            event = WorkspaceEvent(message, self, _Con=Con)
-        elif event_type == EventType.OUTPUT:
-            event = OutputEvent(message)
-        elif event_type == EventType.MODE:
-            event = ModeEvent(message)
-        elif event_type == EventType.WINDOW:
-            event = WindowEvent(message, self, _Con=Con)
-        elif event_type == EventType.BARCONFIG_UPDATE:
-            event = BarconfigUpdateEvent(message)
-        elif event_type == EventType.BINDING:
-            event = BindingEvent(message)
-        elif event_type == EventType.SHUTDOWN:
-            event = ShutdownEvent(message)
-        elif event_type == EventType.TICK:
-            event = TickEvent(message)
-        elif event_type == EventType.INPUT:
-            event = InputEvent(message)
-        else:
+        if (self._switch is not None and event_type == _tick_event_type
+                and self._loads(raw_message).get('payload') == self._switch.marker):
+            await self._switch_subscriptions()
+            return
+
+        try:
+            name, decoder = self._event_decoders[event_type]
+        except KeyError:
             # we have not implemented this event
             return
 
-        await self._pubsub.emit(event_type.to_string(), event)
+        # don't decode events nobody listens to
+        wanted = self._pubsub.wanted(name)
+        if not wanted:
+            return
+        if wanted is not True:
+            change = _peek_change(raw_message)
+            if change is not None and change not in wanted:
+                return
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('got message on subscription socket: type=%s, message=%s', name,
+                        bytes(raw_message))
+        message = self._loads(raw_message)
+        event = decoder(message, self)
+        if self._single_socket:
+            # this task reads the replies too, so it must not wait for room
+            self._hold_event((name, event))
+        else:
+            await self._event_queue.put((name, event))
+
+    def _hold_event(self, item):
+        if not self._held_events and self._event_queue.put_nowait(item):
+            return
+        self._held_events.append(item)
+        if len(self._held_events) == 1:
+            self.tg.start_soon(self._queue_held_events)
+
+    async def _queue_held_events(self):
+        held = self._held_events
+        while held:
+            await self._event_queue.put(held[0])
+            held.popleft()
+
+    async def _event_dispatcher(self):
+        while True:
+            name, event = await self._event_queue.get()
+            await self._pubsub.emit(name, event)
 
     async def _connect(self):
         if self._socket_path:
-            logger.info('using user provided socket path: {}', self._socket_path)
+            logger.info('using user provided socket path: %s', self._socket_path)
 
         if not self._socket_path:
             self._socket_path = await _find_socket_path()
@@ -273,17 +824,71 @@ class Connection:
         if not self.socket_path:
             raise RuntimeError('Failed to retrieve the sway/i3 IPC socket path')
 
-        try:
-            self._cmd_socket = await anyio.connect_unix(self.socket_path)
-            self._cmd_socket_buf = BufferedByteReceiveStream(self._cmd_socket)
+        # the command sockets are replaced as a unit
+        channels = [None] * self._n_cmd_sockets
+        errors = []
 
-            self._sub_socket = await anyio.connect_unix(self.socket_path)
-            self._sub_socket_buf = BufferedByteReceiveStream(self._sub_socket)
+        async def open_channel(n):
+            sock = await anyio.connect_unix(self.socket_path)
+            channels[n] = _CommandChannel(sock, self._pipeline)
 
-        except ConnectionRefusedError:
-            breakpoint()
-            raise
-        await self.subscribe(list(self._subscriptions), force=True)
+        async def open_sub_socket():
+            await self._open_sub_socket()
+            await self._subscribe(list(self._subscriptions), force=True)
+
+        async def run(fn, *args):
+            try:
+                await fn(*args)
+            except Exception as e:
+                errors.append(e)
+
+        # all sockets are opened at once
+        async with anyio.create_task_group() as tg:
+            for n in range(self._n_cmd_sockets):
+                tg.start_soon(run, open_channel, n)
+            # the subscription socket is opened when it is first needed
+            if self._sub_socket is not None or self._subscriptions or self._single_socket:
+                tg.start_soon(run, open_sub_socket)
+
+        if errors:
+            for channel in channels:
+                if channel is not None:
+                    await channel.aclose()
+            raise errors[0]
+
+        old_channels, self._cmd_channels = self._cmd_channels, tuple(channels)
+        if channels:
+            self._cmd_socket = channels[0].sock
+        if self._pipeline:
+            for channel in channels:
+                self.tg.start_soon(channel.run)
+        if self._sub_socket is not None:
+            # not running yet if opening the socket lazily failed
+            self._start_reader()
+        for channel in old_channels:
+            await channel.aclose()
+
+    async def _open_sub_socket(self):
+        old_sub_socket = self._sub_socket
+        self._sub_socket = await anyio.connect_unix(self.socket_path)
+        self._sub_reader = FrameReader(self._sub_socket)
+        self._drop_sub_replies()
+        if self._switch is not None:
+            # the marker of a pending compaction will not arrive
+            switch, self._switch = self._switch, None
+            await switch.sock.aclose()
+            switch.finish(anyio.BrokenResourceError())
+        if old_sub_socket is not None:
+            await old_sub_socket.aclose()
+
+        if self._single_socket:
+            self._cmd_socket = self._sub_socket
+
+    def _drop_sub_replies(self):
+        replies, self._sub_replies = self._sub_replies, deque()
+        self._last_sub_reply = None
+        for reply in replies:
+            reply.fail(anyio.BrokenResourceError())
 
     
     # allow omitting the ``.connect()``
@@ -302,22 +907,36 @@ class Connection:
         :returns: The ``Connection``.
         :rtype: :class:`~.Connection`
         """
+        error = None
         try:
             async with anyio.create_task_group() as tg:
                 self.tg = tg
                 self._pubsub._tg = tg
-                await self._reconnect()
-                tg.start_soon(self._message_reader)
-                yield self
-                tg.cancel_scope.cancel()
+                try:
+                    await self._reconnect()
+                except Exception as e:
+                    # raised below, not wrapped in an exception group
+                    error = e
+                    tg.cancel_scope.cancel()
+                else:
+                    tg.start_soon(self._pubsub.emit, Event.CONNECTED.value, ConnectionEvent())
+                    tg.start_soon(self._event_dispatcher)
+                    yield self
+                    tg.cancel_scope.cancel()
+            if error is not None:
+                raise error
         finally:
             self.tg = None
-            if self._cmd_socket is not None:
-                await self._cmd_socket.aclose()
+            self._connected = False
+            self._held_events.clear()
+            self._reading = False
+            for channel in self._cmd_channels:
+                await channel.aclose()
             if self._sub_socket is not None:
                 await self._sub_socket.aclose()
+                self._sub_socket = None
 
-    async def _reconnect(self):
+    async def _reconnect(self, cause: Optional[Exception] = None):
         if self._reconnect_event is not None:
             await self._reconnect_event.wait()
             if self._reconnect_error is not None:
@@ -325,15 +944,22 @@ class Connection:
             return
 
         self._reconnect_event = anyio.Event()
+        was_connected, self._connected = self._connected, False
+        if was_connected:
+            self.tg.start_soon(self._pubsub.emit, Event.DISCONNECTED.value,
+                               ConnectionEvent(cause))
+
         error = None
-        for tries in range(250):
-            try:
-                await self._connect()
-                error = None
-                break
-            except Exception as e:
-                error = e
-                await anyio.sleep(0.01)
+        self._connect_error = None
+        try:
+            with anyio.fail_after(None if was_connected else self._connect_timeout):
+                await self._connect_with_retries()
+        except TimeoutError:
+            error = TimeoutError(f'could not connect to the sway/i3 ipc socket {self.socket_path} '
+                                 f'within {self._connect_timeout}s')
+            error.__cause__ = self._connect_error
+        except Exception as e:
+            error = e
 
         self._reconnect_event.set()
         self._reconnect_event = None
@@ -341,23 +967,43 @@ class Connection:
         if error is not None:
             raise error
 
-    async def _message(self, message_type: MessageType, payload: str = '') -> bytearray:
-        async with self._wlock:
-            return await self._message_l(message_type, payload)
+        self._connected = True
+        if was_connected:
+            self.tg.start_soon(self._pubsub.emit, Event.RECONNECTED.value, ConnectionEvent())
 
-    async def _message_l(self, message_type: MessageType, payload: str = '') -> bytearray:
+    async def _connect_with_retries(self):
+        delays = self._reconnect_policy.delays()
+        tries = 0
+        while True:
+            tries += 1
+            try:
+                await self._connect()
+                return
+            except _fatal_connect_errors:
+                raise
+            except Exception as e:
+                delay = next(delays, None)
+                if delay is None:
+                    raise ConnectionError(f'could not connect to the sway/i3 ipc socket '
+                                          f'{self.socket_path} ({tries} tries): {e}') from e
+                logger.info('could not connect, retrying in %.3fs', delay, exc_info=e)
+                self._connect_error = e
+                await anyio.sleep(delay)
+
+    async def _message(self, message_type: MessageType, payload: str = '') -> bytearray:
         if message_type is MessageType.SUBSCRIBE:
             raise ValueError('cannot subscribe on the command socket')
 
         logger.info('sending message: type=%s, payload=%s', message_type, payload)
         err = None
-        buf = None
 
         for tries in range(0, 5):
+            channels, sub_socket = self._cmd_channels, self._sub_socket
             try:
-                await self._cmd_socket.send(_pack(message_type, payload))
-                buf = await self._cmd_socket_buf.receive_exactly(_struct_header_size)
-                break
+                if self._single_socket:
+                    return await (await self._send_sub(message_type, payload))
+                channel = min(channels, key=attrgetter('busy'))
+                return await channel.request(message_type, payload)
             except Exception as e:
                 if not self._auto_reconnect:
                     raise e
@@ -365,35 +1011,11 @@ class Connection:
                 logger.info('got connection error, attempting to reconnect', exc_info=e)
                 if err is None:
                     err = e
-                await self._reconnect()
+                # some other request may have reconnected already
+                if channels is self._cmd_channels and sub_socket is self._sub_socket:
+                    await self._reconnect(e)
 
-        if self._cmd_socket is None:
-            return
-        if buf is None:
-            raise e
-
-        magic, message_length, reply_type = _unpack_header(buf)
-        assert reply_type == message_type.value
-        assert magic == _MAGIC
-
-        try:
-            message = bytearray()
-            remaining_length = message_length
-            while remaining_length:
-                buf = await self._cmd_socket_buf.receive_exactly(remaining_length)
-                if not buf:
-                    logger.error('premature ending while reading message (%s bytes remaining)',
-                                 remaining_length)
-                    break
-                message.extend(buf)
-                remaining_length -= len(buf)
-        except ConnectionError as e:
-            if self._auto_reconnect:
-                await self._reconnect()
-            raise e
-
-        logger.info('got message reply: %s', message)
-        return message
+        raise err
 
     async def subscribe(self, events: Union[List[Event], List[str]], force: bool = False):
         """Send a ``SUBSCRIBE`` command to the ipc subscription connection and
@@ -408,6 +1030,11 @@ class Connection:
             connection is already subscribed to the event.
         :vartype force: bool
         """
+        async with self._sub_lock:
+            await self._subscribe(events, force)
+        await self.subscriptions_ready()
+
+    async def _subscribe(self, events, force=False):
         if not events:
             return
 
@@ -432,20 +1059,144 @@ class Connection:
                 return
         logger.info('subscribing to events: %s', subscriptions)
 
+        # recorded first, so that a reconnect subscribes if this fails
         self._subscriptions.update(subscriptions)
 
+        if self._sub_socket is None:
+            await self._open_sub_socket()
+            self._start_reader()
+            # including those of an earlier attempt to open it
+            subscriptions = self._subscriptions
+
         payload = json.dumps([s.value for s in subscriptions])
 
         logger.info('sending SUBSCRIBE message with payload: %s', payload)
+        return await self._send_subscribe(payload)
+
+    async def _send_subscribe(self, payload: str) -> _Reply:
+        reply = _Reply(MessageType.SUBSCRIBE)
+        self._last_sub_reply = reply
+        await self._send_sub(MessageType.SUBSCRIBE, payload, reply)
+        return reply
+
+    async def _send_sub(self, message_type: MessageType, payload: str,
+                        reply: Optional[_Reply] = None) -> _Reply:
+        # sends a request on the subscription socket; the reader hands the
+        # replies to the requests in order
+        if reply is None:
+            reply = _Reply(message_type)
+        async with self._wlock:
+            self._sub_replies.append(reply)
+            await self._sub_socket.send(pack(message_type.value, payload))
+        return reply
+
+    def _wanted_subscriptions(self) -> set:
+        events = set()
+        for name in self._pubsub.events():
+            event = Event(name)
+            if event in Event._subscribable_events:
+                events.add(event)
+        return events
+
+    async def compact_subscriptions(self):
+        """Drop the subscriptions of events that no handler is left for.
+
+        sway/i3 cannot unsubscribe, so this opens a new subscription socket
+        for the remaining events. Then a tick with a marker payload is sent
+        to both sockets: events before it are read from the old socket and
+        events after it from the new one, so none are lost or seen twice.
+        Other ipc clients that subscribe to ticks see the marker too.
+
+        Events that were subscribed to with :func:`subscribe()` but have no
+        handler are dropped as well.
+        """
+        if self.tg is None or self._sub_socket is None:
+            # subscribed when the subscription socket is opened
+            self._subscriptions = self._wanted_subscriptions()
+            return
+
+        async with self._sub_lock:
+            # both sockets need the tick for the marker
+            events = self._wanted_subscriptions() | {Event.TICK}
+            if not self._subscriptions - events:
+                return
+            logger.info('compacting subscriptions: %s => %s', self._subscriptions, events)
+
+            if Event.TICK not in self._subscriptions:
+                self._subscriptions.add(Event.TICK)
+                await (await self._send_subscribe(json.dumps([Event.TICK.value])))
+
+            sock = await anyio.connect_unix(self.socket_path)
+            try:
+                reader = FrameReader(sock)
+                await sock.send(
+                    pack(MessageType.SUBSCRIBE.value, json.dumps([e.value for e in events])))
+                while (await reader.receive())[0] != MessageType.SUBSCRIBE.value:
+                    pass
+            except BaseException:
+                await sock.aclose()
+                raise
+
+            switch = _SubscriptionSwitch(f'asway-compact-{os.getpid()}-{id(sock)}', sock,
+                                         reader, events)
+            self._switch = switch
+            await self._message(MessageType.SEND_TICK, switch.marker)
+            await switch.done.wait()
+            if switch.error is not None:
+                raise switch.error
+
+    async def _switch_subscriptions(self):
+        # called by the reader at the marker on the old socket
+        switch, self._switch = self._switch, None
+        try:
+            # the new socket has the events before the marker, too
+            while True:
+                event_type, raw_message = await switch.reader.receive()
+                if (event_type == _tick_event_type
+                        and self._loads(raw_message).get('payload') == switch.marker):
+                    break
+        except _connection_errors as e:
+            logger.info('could not compact subscriptions', exc_info=e)
+            await switch.sock.aclose()
+            switch.finish(e)
+            return
 
         async with self._wlock:
-            await self._sub_socket.send(_pack(MessageType.SUBSCRIBE, payload))
+            old_sub_socket, old_sub_reader = self._sub_socket, self._sub_reader
+            old_replies, self._sub_replies = self._sub_replies, deque()
+            self._sub_socket, self._sub_reader = switch.sock, switch.reader
+            if self._single_socket:
+                self._cmd_socket = switch.sock
+        self._subscriptions = switch.events
+        if old_replies:
+            # requests that were sent on the old socket
+            self.tg.start_soon(self._finish_replies, old_sub_socket, old_sub_reader, old_replies)
+        else:
+            await old_sub_socket.aclose()
+        switch.finish()
+
+    async def _finish_replies(self, sock, reader: FrameReader, replies: deque):
+        try:
+            while replies:
+                event_type, raw_message = await reader.receive()
+                if not event_type & (1 << 31):
+                    replies.popleft().set(bytes(raw_message))
+        except _connection_errors as e:
+            for reply in replies:
+                reply.fail(e)
+        finally:
+            await sock.aclose()
 
     def on(self,
            event: Union[Event, str],
-           handler: Callable[['Connection', IpcBaseEvent], None] = None):
+           handler: Callable[['Connection', IpcBaseEvent], None] = None,
+           *,
+           coalesce: Optional[float] = None,
+           dispatch: Optional[str] = None,
+           limit: Optional[int] = None,
+           key: Optional[Callable[[IpcBaseEvent], object]] = None):
         def on_wrapped(handler):
-            self._on(event, handler)
+            self._on(event, handler, coalesce=coalesce, dispatch=dispatch, limit=limit, key=key)
             return handler
 
         if handler:
@@ -453,14 +1204,62 @@ class Connection:
         else:
             return on_wrapped
 
-    def _on(self, event: Union[Event, str], handler: Callable[['Connection', IpcBaseEvent], None]):
+    def register_event_decoder(self,
+                               event_type: Union[EventType, str],
+                               decoder: Callable[[dict, 'Connection'], IpcBaseEvent]):
+        """Sets the function that turns the data of an event into the object
+        that is passed to the event handlers.
+
+        The decoder is called with the decoded JSON data of the event and
+        this connection. It can return anything, e.g. the raw ``dict``. If
+        the result has a ``change`` attribute, handlers for detailed events
+        (``window::focus``) work as usual.
+
+        :param event_type: The event to decode.
+        :type event_type: :class:`EventType <asway.EventType>` or str
+        :param decoder: The decoder.
+        :type decoder: :class:`Callable`
+        """
+        if not isinstance(event_type, EventType):
+            event_type = EventType.from_string(event_type)
+        self._event_decoders[_raw_event_type(event_type)] = (event_type.to_string(), decoder)
+
+    def _on(self,
+            event: Union[Event, str],
+            handler: Callable[['Connection', IpcBaseEvent], None],
+            coalesce: Optional[float] = None,
+            dispatch: Optional[str] = None,
+            limit: Optional[int] = None,
+            key: Optional[Callable[[IpcBaseEvent], object]] = None,
+            wait: bool = False):
         """Subscribe to the event and call the handler when it is emitted by
         the sway/i3 ipc.
 
+        By default an async handler is awaited by the event dispatcher when
+        it is the only one for the event, else it runs in a task of its own.
+        ``dispatch`` selects another mode for this handler:
+
+        * ``"serial"``: one event after the other, in order.
+        * ``"concurrent"``: a task per event, at most ``limit`` at a time.
+        * ``"ordered"``: in order for events with the same ``key``, which
+          defaults to the id of the container (the window of window events,
+          the workspace of workspace events), whatever the change; events
+          with different keys are handled concurrently.
+
         :param event: The event to subscribe to.
         :type event: :class:`Event <asway.Event>` or str
         :param handler: The event handler to call.
         :type handler: :class:`Callable`
+        :param coalesce: If given, wait this many seconds after an event and
+            call the handler only with the latest event of the same change
+            for the same container (e.g. one ``window::title`` per window).
+        :type coalesce: float
+        :param dispatch: The dispatch mode of the handler.
+        :type dispatch: str
+        :param limit: The maximum number of concurrent ``"concurrent"`` calls.
+        :type limit: int
+        :param key: Maps an event to its ``"ordered"`` key.
+        :type key: :class:`Callable`
         """
         if type(event) is Event:
             event = event.value
@@ -474,8 +1273,66 @@ class Connection:
 
         logger.info('adding event handler: event=%s, handler=%s', event, handler)
 
-        self._pubsub.subscribe(event, handler)
-        self.tg.start_soon(self.subscribe, [base_event])
+        base_event = Event(base_event)
+        wrapped = handler
+        if dispatch is not None:
+            wrapped = dispatcher(self, wrapped, dispatch, limit, key)
+        if coalesce is not None:
+            wrapped = Coalescer(self, wrapped, coalesce)
+        if wrapped is not handler:
+            self._wrappers.setdefault(handler, []).append(wrapped)
+        # with wait, the dispatcher awaits the handler even if there are others
+        self._pubsub.subscribe(event, wrapped, wait)
+        if base_event in Event._local_events:
+            return
+        if self.tg is None:
+            # subscribed when connecting
+            self._subscriptions.add(base_event)
+        else:
+            self._sub_pending.add(base_event)
+            if self._sub_flushed is None:
+                self._sub_flushed = anyio.Event()
+                self.tg.start_soon(self._flush_subscriptions)
+
+    async def _flush_subscriptions(self):
+        flushed = self._sub_flushed
+        try:
+            # let the other tasks that are ready to run add their events
+            await anyio.sleep(0)
+            async with self._sub_lock:
+                events, self._sub_pending = self._sub_pending, set()
+                self._sub_flushed = None
+                await self._subscribe(list(events))
+        except Exception as e:
+            # resubscribed when reconnecting
+            logger.info('could not subscribe', exc_info=e)
+        finally:
+            if self._sub_flushed is flushed:
+                # cancelled before taking the events: subscribed when connecting
+                self._sub_flushed = None
+                self._subscriptions.update(self._sub_pending)
+                self._sub_pending = set()
+            flushed.set()
+
+    async def subscriptions_ready(self):
+        """Wait until sway/i3 has confirmed the subscriptions requested so far,
+        including those of handlers attached with :func:`on()`. Events that
+        happen after this returns are not missed.
+        """
+        while True:
+            if self._sub_flushed is not None:
+                await self._sub_flushed.wait()
+                continue
+            reply = self._last_sub_reply
+            if reply is None:
+                return
+            try:
+                await reply
+                return
+            except anyio.BrokenResourceError:
+                # a reconnect sent the subscriptions again
+                if reply is self._last_sub_reply:
+                    raise
 
     def off(self, handler: Callable[['Connection', IpcBaseEvent], None]):
         """Unsubscribe the handler from being called on ipc events.
@@ -486,6 +1343,99 @@ class Connection:
         """
         logger.info('removing event handler: handler=%s', handler)
         self._pubsub.unsubscribe(handler)
+        for wrapper in self._wrappers.pop(handler, ()):
+            self._pubsub.unsubscribe(wrapper)
+            while wrapper is not handler:
+                wrapper.close()
+                wrapper = wrapper.handler
+        if self._auto_compact and self.tg is not None:
+            self.tg.start_soon(self._auto_compact_subscriptions)
+
+    async def _auto_compact_subscriptions(self):
+        try:
+            await self.compact_subscriptions()
+        except Exception as e:
+            # a reconnect subscribes to the wanted events only
+            logger.info('could not compact subscriptions', exc_info=e)
+
+    @asynccontextmanager
+    async def events(self, *events: Union[Event, str], buffer: int = 256):
+        """Subscribe to the events and iterate over them::
+
+            async with conn.events(Event.WINDOW_FOCUS, Event.WORKSPACE_FOCUS) as stream:
+                async for event in stream:
+                    ...
+
+        The events are buffered in a memory object stream. When the buffer is
+        full, the event dispatcher waits for the consumer. Bursts can be
+        drained with ``stream.receive_nowait()``.
+
+        :param events: The events to subscribe to.
+        :type events: :class:`Event <asway.Event>` or str
+        :param buffer: The number of events to buffer.
+        :type buffer: int
+        :rtype: :class:`anyio.abc.ObjectReceiveStream`
+        """
+        send, receive = anyio.create_memory_object_stream(buffer)
+
+        async def feed(event):
+            try:
+                try:
+                    send.send_nowait(event)
+                except anyio.WouldBlock:
+                    await send.send(event)
+            except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+                # the consumer has left
+                pass
+
+        for event in events:
+            self._on(event, feed, wait=True)
+        try:
+            async with receive:
+                yield receive
+        finally:
+            self.off(feed)
+            send.close()
+
+    @asynccontextmanager
+    async def tree_mirror(self):
+        """Fetch the layout tree and keep a local copy of it up to date from
+        the events. This is an async context manager.
+
+        :Example:
+
+        .. code-block:: python3
+
+            async with wm.tree_mirror() as mirror:
+                ...
+                focused = mirror.tree.find_focused()
+
+        :rtype: :class:`TreeMirror <asway.TreeMirror>`
+        """
+        mirror = TreeMirror(self)
+        try:
+            await mirror._start()
+            yield mirror
+        finally:
+            mirror._close()
+
+    def signal(self, event: Union[Event, str]):
+        """Get a :class:`blinker.Signal` that is sent for the event, for code
+        that uses blinker. Its receivers get the event as the sender. This
+        needs blinker to be installed.
+
+        Handlers attached with :func:`on()` do not go through blinker.
+
+        :param event: The event to subscribe to.
+        :type event: :class:`Event <asway.Event>` or str
+        :rtype: :class:`blinker.Signal`
+        """
+        if type(event) is Event:
+            event = event.value
+        event = event.replace('-', '_')
+        sig = self._pubsub.signal(event)
+        self._on(event, sig.send)
+        return sig
 
     async def command(self, cmd: str) -> List[CommandReply]:
         """Sends a command to sway/i3.
@@ -498,10 +1448,58 @@ class Connection:
             command given.
         :rtype: list(:class:`CommandReply <asway.CommandReply>`)
         """
+        if not self._batch_commands:
+            return await self._command(cmd)
+
+        if self._batch is None:
+            self._batch = _CommandBatch(self)
+            self.tg.start_soon(self._flush_batch)
+        return await self._batch.command(cmd)
+
+    async def _flush_batch(self):
+        # let the other tasks that are ready to run add their commands
+        await anyio.sleep(0)
+        batch, self._batch = self._batch, None
+        try:
+            await batch.flush()
+        except Exception as e:
+            # the callers got the error
+            logger.info('batched command failed', exc_info=e)
+
+    @asynccontextmanager
+    async def batch(self):
+        """Collects commands and sends them as a single message when the
+        block ends. This is an async context manager.
+
+        The commands are added with the batch's ``command()`` method, which
+        returns an awaitable for the replies to that command. Don't await it
+        within the block.
+
+        sway stops running the commands of a message at the first one that
+        fails, and i3 runs none of them if one cannot be parsed. The callers
+        whose commands did not get all their replies then get a
+        :class:`RuntimeError`, so one bad command fails the commands batched
+        after it. This applies to ``batch_commands`` as well.
+
+        :Example:
+
+        .. code-block:: python3
+
+            async with wm.batch() as batch:
+                for con in workspace.leaves():
+                    batch.command(f'[con_id={con.id}] move container to workspace 5')
+                done = batch.command('workspace 5')
+            replies = await done
+        """
+        batch = _CommandBatch(self)
+        yield batch
+        await batch.flush()
+
+    async def _command(self, cmd: str) -> List[CommandReply]:
         data = await self._message(MessageType.COMMAND, cmd)
 
         if data:
-            data = json.loads(data)
+            data = self._loads(data)
             return CommandReply._parse_list(data)
         else:
             return []
@@ -513,7 +1511,7 @@ class Connection:
         :rtype: :class:`asway.VersionReply`
         """
         data = await self._message(MessageType.GET_VERSION)
-        data = json.loads(data)
+        data = self._loads(data)
         return VersionReply(data)
 
     async def get_bar_config_list(self) -> List[str]:
@@ -523,7 +1521,7 @@ class Connection:
         :rtype: list(str)
         """
         data = await self._message(MessageType.GET_BAR_CONFIG)
-        return json.loads(data)
+        return self._loads(data)
 
     async def get_bar_config(self, bar_id=None) -> Optional[BarConfigReply]:
         """Gets the bar configuration specified by the id.
@@ -543,7 +1541,7 @@ class Connection:
             bar_id = bar_config_list[0]
 
         data = await self._message(MessageType.GET_BAR_CONFIG, bar_id)
-        data = json.loads(data)
+        data = self._loads(data)
         return BarConfigReply(data)
 
     async def get_outputs(self) -> List[OutputReply]:
@@ -553,7 +1551,7 @@ class Connection:
         :rtype: list(:class:`asway.OutputReply`)
         """
         data = await self._message(MessageType.GET_OUTPUTS)
-        data = json.loads(data)
+        data = self._loads(data)
         return OutputReply._parse_list(data)
 
     async def get_workspaces(self) -> List[WorkspaceReply]:
@@ -563,7 +1561,7 @@ class Connection:
         :rtype: list(:class:`asway.WorkspaceReply`)
         """
         data = await self._message(MessageType.GET_WORKSPACES)
-        data = json.loads(data)
+        data = self._loads(data)
         return WorkspaceReply._parse_list(data)
 
     async def get_raw_tree(self) -> Con:
@@ -573,7 +1571,7 @@ class Connection:
         :rtype: :class:`dict`
         """
         data = await self._message(MessageType.GET_TREE)
-        return json.loads(data)
+        return self._loads(data)
 
     async def get_tree(self) -> Con:
         """Gets the root container of the sway/i3 layout tree.
@@ -590,7 +1588,7 @@ class Connection:
         :rtype: list(str)
         """
         data = await self._message(MessageType.GET_MARKS)
-        return json.loads(data)
+        return self._loads(data)
 
     async def get_binding_modes(self) -> List[str]:
         """Gets the names of all currently configured binding modes
@@ -599,7 +1597,7 @@ class Connection:
         :rtype: list(str)
         """
         data = await self._message(MessageType.GET_BINDING_MODES)
-        return json.loads(data)
+        return self._loads(data)
 
     async def get_config(self) -> ConfigReply:
         """Returns the last loaded sway/i3 config.
@@ -608,7 +1606,7 @@ class Connection:
         :rtype: :class:`asway.ConfigReply`
         """
         data = await self._message(MessageType.GET_CONFIG)
-        data = json.loads(data)
+        data = self._loads(data)
         return ConfigReply(data)
 
     async def send_tick(self, payload: str = "") -> TickReply:
@@ -618,7 +1616,7 @@ class Connection:
         :rtype: :class:`asway.TickReply`
         """
         data = await self._message(MessageType.SEND_TICK, payload)
-        data = json.loads(data)
+        data = self._loads(data)
         return TickReply(data)
 
     async def get_inputs(self) -> List[InputReply]:
@@ -628,7 +1626,7 @@ class Connection:
         :rtype: list(:class:`asway.InputReply`)
         """
         data = await self._message(MessageType.GET_INPUTS)
-        data = json.loads(data)
+        data = self._loads(data)
         return InputReply._parse_list(data)
 
     async def get_seats(self) -> List[SeatReply]:
@@ -638,7 +1636,7 @@ class Connection:
         :rtype: list(:class:`asway.SeatReply`)
         """
         data = await self._message(MessageType.GET_SEATS)
-        data = json.loads(data)
+        data = self._loads(data)
         return SeatReply._parse_list(data)
 
     async def main(self):
@@ -23,6 +23,7 @@ class Event(Enum):
     TICK = 'tick'
     INPUT = 'input'
     SEAT = 'seat'
+    BAR_STATE_UPDATE = 'bar_state_update'
     WORKSPACE_FOCUS = 'workspace::focus'
     WORKSPACE_INIT = 'workspace::init'
     WORKSPACE_EMPTY = 'workspace::empty'
@@ -46,9 +47,28 @@ class Event(Enum):
     INPUT_REMOVED = 'input::removed'
     SEAT_ADDED = 'seat::added'
     SEAT_REMOVED = 'seat::removed'
+    # sent by asway itself
+    CONNECTED = 'connected'
+    DISCONNECTED = 'disconnected'
+    RECONNECTED = 'reconnected'
 
 
-Event._subscribable_events = [e for e in Event if '::' not in e.value]
+Event._local_events = [Event.CONNECTED, Event.DISCONNECTED, Event.RECONNECTED]
+Event._subscribable_events = [
+    e for e in Event if '::' not in e.value and e not in Event._local_events
+]
+
+
+class ConnectionEvent(IpcBaseEvent):
+    """Sent by asway when the connection to sway/i3 is established
+    (``connected``), lost (``disconnected``) or established again after a
+    loss (``reconnected``).
+
+    :ivar error: For ``disconnected``, the error that broke the connection.
+    :vartype error: :class:`Exception` or :class:`None`
+    """
+    def __init__(self, error=None):
+        self.error = error
 
 
 class WorkspaceEvent(IpcBaseEvent):
@@ -286,3 +306,21 @@ class SeatEvent(IpcBaseEvent):
         self.ipc_data = data
         self.change = data['change']
         self.seat = data['seat']
+
+
+class BarStateUpdateEvent(IpcBaseEvent):
+    """(sway only) Sent when the visibility of a bar changes because its
+    modifier key is pressed or released.
+
+    :ivar id: The ID of the bar.
+    :vartype id: str
+    :ivar visible_by_modifier: Whether the bar is shown because the modifier
+        is held down.
+    :vartype visible_by_modifier: bool
+    :ivar ipc_data: The raw data from the i3 ipc.
+    :vartype ipc_data: dict
+    """
+    def __init__(self, data):
+        self.ipc_data = data
+        self.id = data['id']
+        self.visible_by_modifier = data['visible_by_modifier']
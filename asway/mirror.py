@@ -0,0 +1,211 @@
+import logging
+from typing import Optional
+
+import anyio
+
+from .con import Con
+from .events import IpcBaseEvent, TickEvent, ConnectionEvent, WindowEvent, WorkspaceEvent
+from ._private.dispatch import dispatcher
+
+logger = logging.getLogger(__name__)
+
+# window changes that only change the container itself
+_window_updates = ('title', 'mark', 'urgent', 'fullscreen_mode')
+# workspace changes that only change the workspace itself
+_workspace_updates = ('urgent', 'rename')
+
+
+class _SyncRequest:
+    def __init__(self):
+        self.done = anyio.Event()
+        self.error = None
+
+
+class TreeMirror:
+    """A local copy of the layout tree that follows the ``window``,
+    ``workspace`` and ``output`` events. Get one with
+    :func:`Connection.tree_mirror() <asway.Connection.tree_mirror>`.
+
+    Title, mark, urgency, fullscreen, focus and close changes are applied to
+    the tree as they come in. Any other change fetches the tree again, and so
+    does closing a tiled container that has siblings, as they are resized.
+    When the event queue has dropped events, the tree is fetched again, too.
+
+    To fetch it, the mirror sends a tick with a marker payload, then
+    requests the tree. The events before the marker are part of the new
+    tree and are dropped; the ones after it are applied to it. Other tick
+    handlers see the marker ticks too.
+
+    :ivar refetches: How often the tree has been fetched.
+    :vartype refetches: int
+    """
+    def __init__(self, conn):
+        self._conn = conn
+        self._tree = None
+        self._focused = None
+        self._marker = None
+        self._serial = 0
+        self._handler = None
+        self._dropped = 0
+        self.refetches = 0
+
+    @property
+    def tree(self) -> Con:
+        """The root of the tree, as of the events handled so far. It is
+        replaced when the tree is fetched again.
+
+        :rtype: :class:`Con <asway.Con>`
+        """
+        return self._tree
+
+    async def _start(self):
+        # one serial handler for all events keeps them in order
+        self._handler = dispatcher(self._conn, self._on_event, 'serial')
+        for event in ('window', 'workspace', 'output', 'tick', 'reconnected'):
+            self._conn.on(event, self._handler)
+        await self._conn.subscriptions_ready()
+        await self.sync()
+
+    def _close(self):
+        self._conn.off(self._handler)
+        self._handler.close()
+
+    async def sync(self):
+        """Fetch the tree again, after the events that are waiting have been
+        handled.
+        """
+        request = _SyncRequest()
+        self._handler(request)
+        await request.done.wait()
+        if request.error is not None:
+            raise request.error
+
+    async def _on_event(self, event):
+        if isinstance(event, _SyncRequest):
+            try:
+                await self._fetch()
+            except Exception as e:
+                event.error = e
+            finally:
+                event.done.set()
+            return
+
+        if self._conn.dropped_events != self._dropped:
+            # the marker may have been dropped, too
+            await self._try_fetch()
+            return
+
+        if isinstance(event, TickEvent):
+            if event.payload == self._marker:
+                self._marker = None
+            return
+
+        if isinstance(event, ConnectionEvent):
+            # events were missed
+            await self._try_fetch()
+            return
+
+        if self._marker is not None or self._tree is None:
+            # before the tree was fetched
+            return
+
+        if not self._apply(event):
+            await self._try_fetch()
+
+    async def _try_fetch(self):
+        try:
+            await self._fetch()
+        except Exception as e:
+            # the next event tries again
+            logger.info('could not fetch the tree', exc_info=e)
+            self._marker = None
+            self._tree = None
+
+    async def _fetch(self):
+        self._serial += 1
+        self._marker = marker = f'asway-mirror-{id(self)}-{self._serial}'
+        self._dropped = self._conn.dropped_events
+        await self._conn.send_tick(marker)
+        tree = await self._conn.get_tree()
+        self._tree = tree
+        self._focused = tree.find_focused()
+        self.refetches += 1
+
+    def _apply(self, event: IpcBaseEvent) -> bool:
+        """Applies the event to the tree.
+
+        :returns: Whether that worked, else the tree needs to be fetched.
+        """
+        if isinstance(event, WindowEvent):
+            change = event.change
+            con = self._tree.find_by_id(event.container.id)
+            if change == 'close':
+                return self._remove(con)
+            if con is None:
+                return False
+            if change in _window_updates:
+                con._update(event.container.ipc_data)
+                return True
+            if change == 'focus':
+                con._update(event.container.ipc_data)
+                self._focus(con)
+                return True
+            return False
+
+        if isinstance(event, WorkspaceEvent):
+            if event.change not in _workspace_updates or event.current is None:
+                return False
+            con = self._tree.find_by_id(event.current.id)
+            if con is None:
+                return False
+            con._update(event.current.ipc_data)
+            return True
+
+        return False
+
+    def _focus(self, con: Con):
+        old = self._focused
+        if old is not None and old is not con:
+            old.focused = False
+            old.ipc_data['focused'] = False
+        con.focused = True
+        con.ipc_data['focused'] = True
+        self._focused = con
+
+        # the focus stacks of the ancestors
+        child = con
+        parent = con.parent
+        while parent is not None:
+            focus = parent.focus
+            if focus and focus[0] != child.id and child.id in focus:
+                focus.remove(child.id)
+                focus.insert(0, child.id)
+            child = parent
+            parent = parent.parent
+
+    def _remove(self, con: Optional[Con]) -> bool:
+        if con is None:
+            # gone already
+            return True
+
+        parent = con.parent
+        tiled = con in parent.nodes
+        for nodes, key in ((parent.nodes, 'nodes'), (parent.floating_nodes, 'floating_nodes')):
+            if con in nodes:
+                nodes.remove(con)
+                raw = parent.ipc_data.get(key, [])
+                for n, data in enumerate(raw):
+                    if data is con.ipc_data:
+                        del raw[n]
+                        break
+        if parent.focus and con.id in parent.focus:
+            parent.focus.remove(con.id)
+        if self._focused is con:
+            self._focused = None
+        parent.invalidate_index()
+
+        if tiled and parent.nodes:
+            # the siblings are resized, without events
+            return False
+        # sway/i3 removes split containers that become empty
+        return parent.type == 'workspace' or bool(parent.nodes or parent.floating_nodes)
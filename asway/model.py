@@ -10,6 +10,8 @@ class Rect:
     :ivar width: The width of the rectangle.
     :vartype width: int
     """
+    __slots__ = ('x', 'y', 'height', 'width')
+
     def __init__(self, data):
         self.x = data['x']
         self.y = data['y']
@@ -27,6 +29,8 @@ class OutputMode:
     :vartype refresh: The refresh rate of the output in this mode.
     :vartype refresh: int
     """
+    __slots__ = ('width', 'height', 'refresh')
+
     def __init__(self, data):
         self.width = data['width']
         self.height = data['height']
@@ -59,6 +63,8 @@ class Gaps:
     :ivar bottom: The bottom outer gaps.
     :vartype bottom: int or :class:`None` if not supported.
     """
+    __slots__ = ('inner', 'outer', 'left', 'right', 'top', 'bottom')
+
     def __init__(self, data):
         self.inner = data['inner']
         self.outer = data['outer']
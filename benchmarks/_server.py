@@ -0,0 +1,69 @@
+"""A minimal sway/i3 ipc server for the benchmarks. It answers commands,
+``SUBSCRIBE``, ``SEND_TICK`` and ``GET_VERSION`` and sends the first tick to
+new tick subscribers; everything else gets an empty object.
+"""
+
+import json
+import os
+import struct
+from contextlib import asynccontextmanager
+
+import anyio
+from anyio.streams.buffered import BufferedByteReceiveStream
+
+_header = struct.Struct('=6sII')
+_tick_event = (1 << 31) | 7
+
+
+def _message(message_type: int, obj) -> bytes:
+    data = json.dumps(obj).encode()
+    return _header.pack(b'i3-ipc', len(data), message_type) + data
+
+
+async def _serve(stream, subscribers: list):
+    reader = BufferedByteReceiveStream(stream)
+    try:
+        while True:
+            magic, length, message_type = _header.unpack(await reader.receive_exactly(_header.size))
+            payload = (await reader.receive_exactly(length)).decode() if length else ''
+            if message_type == 0:
+                reply = [{'success': True} for cmd in payload.split(';') if cmd.strip()]
+            elif message_type == 2:
+                reply = {'success': True}
+            elif message_type == 7:
+                reply = {'major': 4, 'minor': 22, 'patch': 0, 'human_readable': '4.22',
+                         'loaded_config_file_name': ''}
+            else:
+                reply = {}
+            if message_type == 10:
+                reply = {'success': True}
+                for sub in subscribers:
+                    await sub.send(_message(_tick_event, {'first': False, 'payload': payload}))
+            await stream.send(_message(message_type, reply))
+            if message_type == 2 and 'tick' in json.loads(payload):
+                subscribers.append(stream)
+                await stream.send(_message(_tick_event, {'first': True, 'payload': ''}))
+    except (anyio.EndOfStream, anyio.IncompleteRead, anyio.BrokenResourceError,
+            anyio.ClosedResourceError):
+        pass
+    finally:
+        if stream in subscribers:
+            subscribers.remove(stream)
+
+
+@asynccontextmanager
+async def fake_server(path: str):
+    """Serves the socket at ``path`` while the context is active."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    subscribers = []
+    async with await anyio.create_unix_listener(path) as listener:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, lambda stream: _serve(stream, subscribers))
+            try:
+                yield path
+            finally:
+                tg.cancel_scope.cancel()
+    os.unlink(path)
@@ -0,0 +1,78 @@
+"""Synthetic sway layout trees for the benchmarks."""
+
+import json
+
+
+def _rect(x=0, y=0, width=1920, height=1080):
+    return {'x': x, 'y': y, 'width': width, 'height': height}
+
+
+def _con(id, type, name, nodes=(), **kw):
+    data = {
+        'id': id,
+        'type': type,
+        'orientation': 'horizontal',
+        'percent': None,
+        'urgent': False,
+        'marks': [],
+        'focused': False,
+        'layout': 'splith',
+        'border': 'normal',
+        'current_border_width': 2,
+        'rect': _rect(),
+        'deco_rect': _rect(0, 0, 0, 0),
+        'window_rect': _rect(2, 0, 1916, 1078),
+        'geometry': _rect(0, 0, 800, 600),
+        'name': name,
+        'window': None,
+        'nodes': list(nodes),
+        'floating_nodes': [],
+        'focus': [n['id'] for n in nodes],
+        'fullscreen_mode': 0,
+        'sticky': False,
+    }
+    data.update(kw)
+    return data
+
+
+def make_tree(containers: int, per_workspace: int = 10) -> dict:
+    """Builds a tree with (about) this many containers, most of them
+    windows.
+    """
+    ids = iter(range(1, 10 * containers + 100))
+    workspaces = []
+    left = containers
+    num = 1
+    while left > 0:
+        count = min(per_workspace, left)
+        windows = []
+        for i in range(count):
+            id = next(ids)
+            windows.append(
+                _con(id, 'con', f'window {id} - a title of typical length',
+                     pid=1000 + id, app_id=None, visible=True, shell='xwayland',
+                     inhibit_idle=False, idle_inhibitors={'user': 'none', 'application': 'none'},
+                     window=0x200000 + id, marks=[f'mark{id}'] if id % 7 == 0 else [],
+                     window_properties={'class': 'Firefox', 'instance': 'Navigator',
+                                        'title': f'window {id}', 'transient_for': None}))
+        workspaces.append(_con(next(ids), 'workspace', str(num), windows, num=num,
+                               representation='H[Firefox]', output='HDMI-A-1'))
+        left -= count
+        num += 1
+
+    # the last window is focused, at the end of a breadth-first search
+    focused = workspaces[-1]['nodes'][-1]
+    focused['focused'] = True
+    workspaces[-1]['focus'].reverse()
+
+    scratch = _con(next(ids), 'workspace', '__i3_scratch')
+    i3 = _con(next(ids), 'output', '__i3', [scratch])
+    output = _con(next(ids), 'output', 'HDMI-A-1', workspaces, active=True, primary=False)
+    output['focus'].reverse()
+    root = _con(next(ids), 'root', 'root', [i3, output])
+    root['focus'].reverse()
+    return root
+
+
+def make_tree_json(containers: int) -> bytes:
+    return json.dumps(make_tree(containers)).encode()
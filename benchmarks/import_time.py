@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Measure how long importing asway takes, using ``python -X importtime``.
+
+    python3 benchmarks/import_time.py [--max-ms N]
+
+Each statement runs in a fresh interpreter, several times; the best run is
+reported. With ``--max-ms`` the script fails if ``import asway`` takes
+longer than that, which is meant to catch eager imports creeping back in.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+STATEMENTS = (
+    'import asway',
+    'from asway import Con',
+    'from asway import Connection',
+)
+
+_line_re = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def _top_level_imports(statement: str) -> dict:
+    """Runs the statement in a fresh interpreter.
+
+    :returns: The cumulative import time in µs of each module that was
+        imported at the top level.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        m = _line_re.match(line)
+        if m is not None and not m.group(3):
+            times[m.group(4)] = int(m.group(2))
+    return times
+
+
+def import_time(statement: str, runs: int = 5) -> float:
+    """The best time in ms that the imports done by the statement take,
+    not counting what the interpreter imports at startup.
+    """
+    startup = set(_top_level_imports('pass'))
+    best = None
+    for _ in range(runs):
+        times = _top_level_imports(statement)
+        total = sum(t for name, t in times.items() if name not in startup)
+        if best is None or total < best:
+            best = total
+    return best / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-ms', type=float, help='fail if "import asway" takes longer')
+    args = parser.parse_args()
+
+    times = {}
+    for statement in STATEMENTS:
+        times[statement] = import_time(statement)
+        print(f'{statement:32} {times[statement]:8.2f} ms')
+
+    if args.max_ms is not None and times['import asway'] > args.max_ms:
+        print(f'import asway takes more than {args.max_ms} ms', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
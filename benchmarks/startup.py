@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Time how long a ``Connection`` takes from ``connect()`` to its first
+reply, against a local fake ipc server.
+
+    python3 benchmarks/startup.py [--runs N]
+
+The cases are a command-only client, a client with event handlers (which
+also waits for the subscriptions), and both in single-socket mode.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import anyio
+
+from asway import Connection
+
+from _server import fake_server
+
+CASES = {
+    'command only': {},
+    'handlers': {'handlers': True},
+    'single socket': {'single_socket': True},
+    'single socket, handlers': {'single_socket': True, 'handlers': True},
+}
+
+
+async def startup(path: str, handlers: bool = False, **kw) -> float:
+    """The time in ms until the first reply (and, with handlers, until the
+    subscriptions are confirmed).
+    """
+    conn = Connection(socket_path=path, **kw)
+    start = time.perf_counter()
+    async with conn.connect():
+        if handlers:
+            for event in ('window', 'workspace', 'output', 'tick'):
+                conn.on(event, lambda e: None)
+            await conn.subscriptions_ready()
+        await conn.get_version()
+        return (time.perf_counter() - start) * 1000
+
+
+async def main(runs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        async with fake_server(os.path.join(tmp, 'ipc.sock')) as path:
+            for name, kw in CASES.items():
+                times = sorted([await startup(path, **kw) for _ in range(runs)])
+                print(f'{name:26} best {times[0]:7.3f} ms, median {times[len(times) // 2]:7.3f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+    anyio.run(main, args.runs)
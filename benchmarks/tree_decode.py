@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Time the JSON decoding of a ``GET_TREE`` reply with each installed
+backend, at 50, 500 and 5000 containers.
+
+    python3 benchmarks/tree_decode.py
+"""
+
+import timeit
+
+from asway._private.codec import BACKENDS, get_loads
+
+from _tree import make_tree_json
+
+
+def main():
+    loaders = {}
+    for backend in BACKENDS:
+        try:
+            loaders[backend] = get_loads(backend)
+        except ImportError:
+            print(f'{backend}: not installed')
+
+    for size in (50, 500, 5000):
+        data = make_tree_json(size)
+        print(f'\n{size} containers, {len(data) // 1024} KiB')
+        for backend, loads in loaders.items():
+            number, total = timeit.Timer(lambda: loads(data)).autorange()
+            print(f'  {backend:8} {total / number * 1000:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
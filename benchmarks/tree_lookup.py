@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Time looking up containers in a tree of 1000 and 10000 containers.
+
+    python3 benchmarks/tree_lookup.py
+
+Each case looks up 100 containers by id and by window in a fresh tree, so
+the time includes building the lookup index.
+"""
+
+import json
+import time
+
+from asway import Con
+
+from _tree import make_tree_json
+
+
+def main():
+    for size in (1000, 10000):
+        data = json.loads(make_tree_json(size))
+        cons = Con(data, None, None).leaves()[::size // 100]
+
+        for name, lookup in (('find_by_id', lambda tree, con: tree.find_by_id(con.id)),
+                             ('find_by_window', lambda tree, con: tree.find_by_window(con.window))):
+            tree = Con(data, None, None)
+            start = time.perf_counter()
+            for con in cons:
+                assert lookup(tree, con).id == con.id
+            total = (time.perf_counter() - start) * 1000
+            print(f'{size:6} containers, {len(cons)} x {name:15} {total:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Measure the memory a ``Con`` tree takes, as built by ``get_tree()``, at
+1000 and 10000 containers, and how long building it takes.
+
+    python3 benchmarks/tree_memory.py
+
+The decoded JSON, which the tree keeps as ``ipc_data``, is reported
+separately. Containers are built when they are first used, so the tree is
+measured once as returned, once after ``find_focused()``, and once with
+every container and its geometry built.
+"""
+
+import json
+import time
+import tracemalloc
+
+from asway import Con
+
+from _tree import make_tree_json
+
+
+def _allocated(build) -> (object, int):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def _build_all(data) -> Con:
+    tree = Con(data, None, None)
+    for con in tree:
+        con.rect, con.window_rect, con.deco_rect, con.geometry, con.gaps
+    return tree
+
+
+def _find_focused(data) -> Con:
+    tree = Con(data, None, None)
+    tree.find_focused()
+    return tree
+
+
+CASES = {
+    'as returned': lambda data: Con(data, None, None),
+    'find_focused()': _find_focused,
+    'fully built': _build_all,
+}
+
+
+def main():
+    for size in (1000, 10000):
+        raw = make_tree_json(size)
+        data, data_size = _allocated(lambda: json.loads(raw))
+        nodes = 1 + len(Con(data, None, None).descendants())
+
+        print(f'{size} containers ({nodes} nodes)')
+        print(f'  decoded JSON     {data_size / 1024:10.1f} KiB')
+        for name, build in CASES.items():
+            tree, tree_size = _allocated(lambda: build(data))
+
+            start = time.perf_counter()
+            build(data)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            print(f'  {name:16} {tree_size / 1024:10.1f} KiB, {tree_size / nodes:6.0f} B/node, '
+                  f'{build_ms:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
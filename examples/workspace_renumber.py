@@ -41,10 +41,13 @@ async def fix_ordering(i3conn):
         workspaces = (await i3conn.get_tree()).workspaces()
         disordered_workspaces, least_number = await find_disordered(i3conn)
         containers = list(filter(lambda x: x.num in disordered_workspaces, workspaces))
-        for c in containers:
-            for i in c.leaves():
-                i.command("move container to workspace %s" % least_number)
-            least_number += 1
+        # send all the moves as a single message
+        async with i3conn.batch() as batch:
+            for c in containers:
+                for i in c.leaves():
+                    batch.command('[con_id="%s"] move container to workspace %s' %
+                                  (i.id, least_number))
+                least_number += 1
     return
 
 
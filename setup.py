@@ -8,9 +8,14 @@ from setuptools import setup, find_packages
 
 REQUIRES_PYTHON = '>=3.4.0'
 REQUIRED = [
-    "blinker >=1.6",
 ]
-EXTRAS = {}
+EXTRAS = {
+    # Connection.signal()
+    'blinker': ['blinker >=1.6'],
+    # faster JSON decoding, picked up automatically
+    'orjson': ['orjson'],
+    'msgspec': ['msgspec'],
+}
 
 here = os.path.abspath(os.path.dirname(__file__))
 
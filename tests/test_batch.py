@@ -0,0 +1,62 @@
+from .ipctest import i3
+
+from asway import Connection, CommandReply
+from asway.connection import _CommandBatch
+
+import pytest
+import anyio
+
+
+class TestBatch:
+    @pytest.mark.anyio
+    async def test_batch_block(self, i3):
+        async with i3.connect():
+            async with i3.batch() as batch:
+                first = batch.command('nop; nop')
+                second = batch.command('nop')
+                empty = batch.command('')
+
+            first = await first
+            assert len(first) == 2
+            assert all(type(r) is CommandReply and r.success for r in first)
+            assert len(await second) == 1
+            assert await empty == []
+
+    @pytest.mark.anyio
+    async def test_batch_commands(self, i3):
+        results = {}
+
+        async with Connection(socket_path=i3.socket_path, batch_commands=True) as conn:
+
+            async def command(n):
+                results[n] = await conn.command('; '.join(['nop'] * n))
+
+            async with anyio.create_task_group() as tg:
+                for n in range(1, 6):
+                    tg.start_soon(command, n)
+
+        for n, replies in results.items():
+            assert len(replies) == n
+            assert all(r.success for r in replies)
+
+    @pytest.mark.anyio
+    async def test_batch_stops_at_failed_command(self):
+
+        class Conn:
+            async def _command(self, payload):
+                # sway stops at the first command that fails
+                return [
+                    CommandReply(dict(success=True)),
+                    CommandReply(dict(success=False, error='Unknown/invalid command')),
+                ]
+
+        batch = _CommandBatch(Conn())
+        first = batch.command('nop')
+        second = batch.command('bogus; nop')
+        third = batch.command('nop')
+        await batch.flush()
+
+        assert [r.success for r in await first] == [True]
+        for reply in (second, third):
+            with pytest.raises(RuntimeError, match='Unknown/invalid command'):
+                await reply
@@ -0,0 +1,25 @@
+from asway._private.codec import get_loads
+
+import pytest
+
+
+@pytest.mark.parametrize('backend', ['msgspec', 'orjson', 'json'])
+def test_loads(backend):
+    try:
+        loads = get_loads(backend)
+    except ImportError:
+        pytest.skip(f'{backend} is not installed')
+
+    data = b'{"name": "caf\xc3\xa9", "nodes": [1, 2]}'
+    expected = {'name': 'café', 'nodes': [1, 2]}
+    assert loads(data) == expected
+    assert loads(bytearray(data)) == expected
+    assert loads(memoryview(data)) == expected
+
+    # window titles need not be valid UTF-8
+    assert loads(b'{"name": "a\xffb"}') == {'name': 'a\udcffb'}
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_loads('yaml')
@@ -0,0 +1,144 @@
+from asway import Con
+
+import pytest
+
+
+def rect():
+    return {'x': 0, 'y': 0, 'width': 100, 'height': 100}
+
+
+def con(id, type='con', name=None, nodes=(), **kw):
+    data = {'id': id, 'type': type, 'name': name, 'rect': rect(), 'nodes': list(nodes),
+            'floating_nodes': [], 'marks': [], 'focus': [], 'focused': False}
+    data.update(kw)
+    return data
+
+
+def tree():
+    windows = [
+        con(10 + n, name=f'win{n}', window=100 + n, pid=1000 + n,
+            window_properties={'class': 'X', 'title': f'win{n}'}, marks=[f'm{n}'] if n % 2 else [])
+        for n in range(4)
+    ]
+    workspace = con(3, 'workspace', '1', windows, num=1)
+    scratch = con(4, 'workspace', '__i3_scratch')
+    return Con(con(1, 'root', 'root', [con(2, 'output', 'OUT', [workspace, scratch])]), None, None)
+
+
+class TestCon:
+    def test_attributes(self):
+        root = tree()
+        win = root.find_by_id(11)
+        assert win.name == 'win1'
+        assert win.window_class == 'X'
+        assert win.window_title == 'win1'
+        assert win.marks == ['m1']
+        assert win.rect.width == 100
+        assert win.window_rect is None
+        assert win.gaps is None
+        assert win.parent.type == 'workspace'
+
+    def test_slots(self):
+        root = tree()
+        with pytest.raises(AttributeError):
+            root.extra = 1
+
+    def test_subclass_attributes(self):
+        class MyCon(Con):
+            pass
+
+        root = MyCon(tree().ipc_data, None, None)
+        root.extra = 1
+        assert type(root.nodes[0]) is MyCon
+
+    def test_lazy_nodes(self):
+        root = tree()
+        assert root._nodes is not root.nodes
+        output = root.nodes[0]
+        assert output.nodes[0] is output.nodes[0]
+        assert output.nodes[0].parent is output
+
+        output.nodes = []
+        assert list(output) == []
+
+    def test_find_focused(self):
+        workspaces = [
+            con(3, 'workspace', '1', [con(10), con(11)], num=1, focus=[11, 10]),
+            con(4, 'workspace', '2', [con(12), con(13, focused=True)], num=2, focus=[13, 12]),
+        ]
+        output = con(2, 'output', 'OUT', workspaces, focus=[4, 3])
+        root = Con(con(1, 'root', 'root', [output], focus=[2]), None, None)
+
+        assert root.find_focused().id == 13
+        # only the containers on the focus path were built
+        assert root.nodes[0].nodes[0]._nodes is not root.nodes[0].nodes[0].nodes
+        assert root.nodes[0].nodes[0].find_focused() is None
+
+        # without focus stacks
+        root = tree()
+        root.find_by_id(12).focused = True
+        assert root.find_focused().id == 12
+
+    def test_lazy_geometry(self):
+        root = tree()
+        assert root.rect is root.rect
+        assert root.geometry is None
+
+        root.rect = None
+        assert root.rect is None
+
+    def test_find(self):
+        root = tree()
+        workspace = root.find_by_id(3)
+        assert workspace.name == '1'
+        assert root.find_by_window(102).id == 12
+        assert [c.id for c in root.find_by_pid(1003)] == [13]
+        assert [c.id for c in root.find_marked()] == [11, 13]
+        assert [c.id for c in root.find_marked('m3')] == [13]
+        assert root.scratchpad().id == 4
+
+        # only descendants are found
+        assert workspace.find_by_id(3) is None
+        assert workspace.find_by_id(12).id == 12
+        assert workspace.nodes[0].find_by_id(12) is None
+        assert root.find_by_id(2).scratchpad().id == 4
+
+    def test_invalidate_index(self):
+        root = tree()
+        workspace = root.find_by_id(3)
+        workspace.nodes = workspace.nodes[:2]
+        assert root.find_by_id(12) is None
+
+        workspace.nodes.append(Con(con(20), workspace, None))
+        assert root.find_by_id(20) is None
+        root.invalidate_index()
+        assert root.find_by_id(20).parent is workspace
+
+    def test_diff(self):
+        old = tree()
+        data = tree().ipc_data
+        workspace = data['nodes'][0]['nodes'][0]
+        scratch = data['nodes'][0]['nodes'][1]
+        win0, win1, win2, win3 = workspace['nodes']
+        win0['name'] = 'renamed'
+        win0['focused'] = True
+        win1['rect'] = dict(rect(), width=50)
+        win1['marks'] = []
+        win2['floating'] = 'user_on'
+        workspace['nodes'] = [win0, win1, win2, con(20, name='new')]
+        scratch['nodes'] = [win3]
+        new = Con(data, None, None)
+
+        diff = Con.diff(old, new)
+        assert [c.id for c in diff.added] == [20]
+        assert diff.removed == []
+        assert [(a.id, b.id) for a, b in diff.moved] == [(13, 13)]
+        assert [a.id for a, b in diff.retitled] == [10]
+        assert [a.id for a, b in diff.refocused] == [10]
+        assert [a.id for a, b in diff.resized] == [11]
+        assert [a.id for a, b in diff.remarked] == [11]
+        assert [a.id for a, b in diff.floating] == [12]
+
+        diff = Con.diff(new, old)
+        assert [c.id for c in diff.removed] == [20]
+        assert not Con.diff(old, tree())
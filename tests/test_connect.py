@@ -0,0 +1,134 @@
+from asway import Connection, ReconnectPolicy
+from asway.connection import (_find_socket_path, _is_live_socket, _read_socket_cache,
+                              _scan_socket_paths, _write_socket_cache)
+
+import os
+import socket
+import subprocess
+import time
+
+import pytest
+
+
+class TestConnect:
+    @pytest.mark.anyio
+    async def test_connect_timeout(self, tmp_path):
+        conn = Connection(socket_path=str(tmp_path / 'missing'), connect_timeout=0.2,
+                          reconnect_policy=ReconnectPolicy.unlimited())
+        with pytest.raises(TimeoutError) as err:
+            async with conn.connect():
+                pass
+
+        assert 'missing' in str(err.value)
+        assert isinstance(err.value.__cause__, FileNotFoundError)
+
+    @pytest.mark.anyio
+    async def test_retries_exhausted(self, tmp_path):
+        conn = Connection(socket_path=str(tmp_path / 'missing'),
+                          reconnect_policy=ReconnectPolicy(max_tries=2))
+        with pytest.raises(ConnectionError) as err:
+            async with conn.connect():
+                pass
+
+        assert isinstance(err.value.__cause__, FileNotFoundError)
+
+
+@pytest.fixture
+def runtime_dir(tmp_path, monkeypatch):
+    (tmp_path / 'run').mkdir()
+    (tmp_path / 'tmp').mkdir()
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path / 'run'))
+    monkeypatch.setenv('WAYLAND_DISPLAY', 'wayland-1')
+    monkeypatch.delenv('SWAYSOCK', raising=False)
+    monkeypatch.setattr('tempfile.gettempdir', lambda: str(tmp_path / 'tmp'))
+    return tmp_path / 'run'
+
+
+def bind(path, mtime=None, listen=True):
+    sock = socket.socket(socket.AF_UNIX)
+    sock.bind(str(path))
+    if listen:
+        sock.listen()
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return sock
+
+
+def dead_pid():
+    process = subprocess.Popen(['true'])
+    process.wait()
+    return process.pid
+
+
+def scan(tmp_path, try_i3=False):
+    # without the sockets of a window manager that runs here
+    paths = _scan_socket_paths(try_i3)
+    return [os.path.relpath(path, tmp_path) for path in paths if path.startswith(str(tmp_path))]
+
+
+class TestSocketPath:
+    def test_cache(self, runtime_dir):
+        path = runtime_dir / f'sway-ipc.{os.getuid()}.{os.getpid()}.sock'
+        with bind(path):
+            _write_socket_cache(str(path))
+            assert (runtime_dir / 'asway-socket.wayland-1').read_text() == str(path)
+            assert _read_socket_cache() == str(path)
+
+    def test_stale_cache(self, runtime_dir):
+        assert _read_socket_cache() is None
+
+        path = runtime_dir / f'sway-ipc.{os.getuid()}.{dead_pid()}.sock'
+        with bind(path):
+            _write_socket_cache(str(path))
+            assert _read_socket_cache() is None
+
+        path = runtime_dir / 'not-a-socket'
+        path.write_text('')
+        _write_socket_cache(str(path))
+        assert _read_socket_cache() is None
+
+    def test_other_user(self, runtime_dir, monkeypatch):
+        path = runtime_dir / f'sway-ipc.{os.getuid()}.{os.getpid()}.sock'
+        with bind(path):
+            assert _is_live_socket(str(path))
+            monkeypatch.setattr('os.getuid', lambda: os.stat(path).st_uid + 1)
+            assert not _is_live_socket(str(path))
+
+    def test_scan(self, runtime_dir):
+        tmp_path = runtime_dir.parent
+        uid, pid = os.getuid(), os.getpid()
+        now = time.time()
+        with bind(tmp_path / 'run' / f'sway-ipc.{uid}.{pid}.sock', now), \
+                bind(tmp_path / 'run' / f'sway-ipc.{uid}.{dead_pid()}.sock', now + 20), \
+                bind(tmp_path / 'tmp' / f'sway-ipc.{uid}.{pid}.sock', now + 30):
+            # the runtime directory comes first, even if /tmp has newer sockets
+            assert scan(tmp_path) == [f'run/sway-ipc.{uid}.{pid}.sock',
+                                      f'tmp/sway-ipc.{uid}.{pid}.sock']
+
+            (runtime_dir / 'i3').mkdir()
+            (tmp_path / 'tmp' / 'i3-user').mkdir()
+            with bind(runtime_dir / 'i3' / f'ipc-socket.{pid}', now + 10), \
+                    bind(tmp_path / 'tmp' / 'i3-user' / f'ipc-socket.{pid}', now + 40):
+                assert scan(tmp_path) == [f'run/sway-ipc.{uid}.{pid}.sock',
+                                          f'tmp/sway-ipc.{uid}.{pid}.sock']
+                assert scan(tmp_path, try_i3=True) == [f'run/i3/ipc-socket.{pid}',
+                                                       f'run/sway-ipc.{uid}.{pid}.sock',
+                                                       f'tmp/i3-user/ipc-socket.{pid}',
+                                                       f'tmp/sway-ipc.{uid}.{pid}.sock']
+
+    @pytest.mark.anyio
+    async def test_find_socket_path(self, runtime_dir):
+        path = runtime_dir / f'sway-ipc.{os.getuid()}.{os.getpid()}.sock'
+        with bind(path, time.time() + 1000):
+            assert await _find_socket_path() == str(path)
+            assert (runtime_dir / 'asway-socket.wayland-1').read_text() == str(path)
+
+    @pytest.mark.anyio
+    async def test_skip_refused_socket(self, runtime_dir):
+        uid, now = os.getuid(), time.time()
+        # left behind by a window manager whose pid is in use again
+        stale = runtime_dir / f'sway-ipc.{uid}.{os.getpid()}.sock'
+        path = runtime_dir / f'sway-ipc.{uid}.{os.getppid()}.sock'
+        with bind(stale, now + 10, listen=False), bind(path, now):
+            _write_socket_cache(str(stale))
+            assert await _find_socket_path() == str(path)
@@ -0,0 +1,111 @@
+from asway._private.dispatch import Coalescer, dispatcher
+
+import pytest
+import anyio
+
+
+class Con:
+    def __init__(self, id):
+        self.id = id
+
+
+class WindowEvent:
+    def __init__(self, change, id, n):
+        self.change = change
+        self.container = Con(id)
+        self.n = n
+
+
+class Conn:
+    def __init__(self, tg):
+        self.tg = tg
+
+
+class TestDispatch:
+    @pytest.mark.anyio
+    async def test_coalesce(self):
+        seen = []
+        async with anyio.create_task_group() as tg:
+            handler = Coalescer(Conn(tg), seen.append, 0.05)
+            for n in range(5):
+                handler(WindowEvent('title', 1, n))
+                handler(WindowEvent('title', 2, n))
+            handler(WindowEvent('focus', 1, 5))
+
+        assert sorted((e.container.id, e.change, e.n) for e in seen) == [
+            (1, 'focus', 5), (1, 'title', 4), (2, 'title', 4)]
+
+    @pytest.mark.anyio
+    async def test_serial(self):
+        running = 0
+        seen = []
+
+        async def on_window(e):
+            nonlocal running
+            running += 1
+            assert running == 1
+            await anyio.sleep(0.01)
+            seen.append(e.n)
+            running -= 1
+
+        async with anyio.create_task_group() as tg:
+            handler = dispatcher(Conn(tg), on_window, 'serial')
+            for n in range(5):
+                handler(WindowEvent('title', n, n))
+
+        assert seen == list(range(5))
+
+    @pytest.mark.anyio
+    async def test_ordered(self):
+        seen = []
+
+        async def on_window(e):
+            await anyio.sleep(0.02 if e.container.id == 1 else 0.001)
+            seen.append((e.container.id, e.n))
+
+        async with anyio.create_task_group() as tg:
+            handler = dispatcher(Conn(tg), on_window, 'ordered')
+            for n in range(3):
+                handler(WindowEvent('title', 1, n))
+                handler(WindowEvent('title', 2, n))
+
+        assert [n for id, n in seen if id == 1] == [0, 1, 2]
+        assert [n for id, n in seen if id == 2] == [0, 1, 2]
+        assert seen[:3] == [(2, 0), (2, 1), (2, 2)]
+
+    @pytest.mark.anyio
+    async def test_ordered_per_container(self):
+        seen = []
+
+        async def on_window(e):
+            await anyio.sleep(0.02 if e.change == 'new' else 0.001)
+            seen.append(e.change)
+
+        async with anyio.create_task_group() as tg:
+            handler = dispatcher(Conn(tg), on_window, 'ordered')
+            for n, change in enumerate(('new', 'title', 'close')):
+                handler(WindowEvent(change, 7, n))
+
+        assert seen == ['new', 'title', 'close']
+
+    @pytest.mark.anyio
+    async def test_concurrent_limit(self):
+        running = peak = 0
+
+        async def on_window(e):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await anyio.sleep(0.01)
+            running -= 1
+
+        async with anyio.create_task_group() as tg:
+            handler = dispatcher(Conn(tg), on_window, 'concurrent', limit=3)
+            for n in range(10):
+                handler(WindowEvent('title', n, n))
+
+        assert peak == 3
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            dispatcher(None, print, 'parallel')
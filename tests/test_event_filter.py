@@ -0,0 +1,69 @@
+from asway import Connection, EventType
+from asway._private import PubSub
+from asway._private.framing import FrameReader, pack
+from asway.connection import _peek_change, _raw_event_type
+
+import json
+
+import pytest
+
+
+class FrameStream:
+    def __init__(self, data):
+        self.data = data
+
+    async def receive(self, max_bytes=65536):
+        data, self.data = self.data, b''
+        return data
+
+
+def window_event(change, change_first=True):
+    container = {'id': 1, 'type': 'con', 'name': 'x', 'nodes': [], 'floating_nodes': []}
+    if change_first:
+        data = {'change': change, 'container': container}
+    else:
+        data = {'container': container, 'change': change}
+    return pack(_raw_event_type(EventType.WINDOW), json.dumps(data))
+
+
+@pytest.mark.parametrize('data, change', [
+    (b'{"change": "focus", "container": {}}', 'focus'),
+    (b' {\n  "change":"new"}', 'new'),
+    (b'{"container": {}, "change": "focus"}', None),
+    (b'{"change": "a\\"b"}', None),
+    (b'{"payload": ""}', None),
+])
+def test_peek_change(data, change):
+    assert _peek_change(data) == change
+
+
+def test_wanted_detailed_handlers():
+    pubsub = PubSub(None)
+    pubsub.subscribe('window::focus', print)
+    pubsub.subscribe('window::title', print)
+
+    assert pubsub.wanted('window') == {'focus', 'title'}
+    assert pubsub.wanted('workspace') is None
+
+
+@pytest.mark.anyio
+async def test_skip_unwanted_events():
+    conn = Connection()
+    conn._pubsub.subscribe('window::focus', print)
+    frames = [
+        window_event('focus'),
+        window_event('title'),
+        # the change is not peeked, so the event is decoded
+        window_event('title', change_first=False),
+        pack(_raw_event_type(EventType.WORKSPACE), '{"change": "focus"}'),
+    ]
+    conn._sub_reader = FrameReader(FrameStream(b''.join(frames)))
+
+    queued = []
+    for _ in frames:
+        await conn._read_message()
+        while len(conn._event_queue):
+            queued.append(await conn._event_queue.get())
+
+    assert [(name, event.change) for name, event in queued] == [('window', 'focus'),
+                                                                ('window', 'title')]
@@ -0,0 +1,80 @@
+from asway._private.queue import EventQueue
+
+import pytest
+import anyio
+
+
+class Con:
+    def __init__(self, id):
+        self.id = id
+
+
+class WindowEvent:
+    def __init__(self, change, id, n):
+        self.change = change
+        self.container = Con(id)
+        self.n = n
+
+
+def window(change, id, n):
+    return ('window', WindowEvent(change, id, n))
+
+
+class TestEventQueue:
+    @pytest.mark.anyio
+    async def test_drop_oldest(self):
+        queue = EventQueue(2, 'drop_oldest')
+        for n in range(5):
+            await queue.put(('tick', n))
+
+        assert queue.dropped == 3
+        assert [await queue.get() for _ in range(2)] == [('tick', 3), ('tick', 4)]
+
+    @pytest.mark.anyio
+    async def test_coalesce(self):
+        queue = EventQueue(3, 'coalesce')
+        await queue.put(window('title', 1, 0))
+        await queue.put(window('title', 2, 1))
+        await queue.put(window('focus', 1, 2))
+        await queue.put(window('title', 1, 3))
+        await queue.put(window('title', 2, 4))
+
+        assert queue.coalesced == 2
+        assert len(queue) == 3
+        events = [(await queue.get())[1] for _ in range(3)]
+        assert [(e.change, e.container.id, e.n) for e in events] == [
+            ('title', 1, 3), ('title', 2, 4), ('focus', 1, 2)]
+
+    @pytest.mark.anyio
+    async def test_block(self):
+        queue = EventQueue(1, 'block')
+        await queue.put(('tick', 0))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(queue.put, ('tick', 1))
+            await anyio.sleep(0.01)
+            assert len(queue) == 1
+            assert await queue.get() == ('tick', 0)
+            assert await queue.get() == ('tick', 1)
+
+        assert queue.dropped == 0
+
+    @pytest.mark.anyio
+    async def test_coalesce_blocks_without_match(self):
+        queue = EventQueue(1, 'coalesce')
+        await queue.put(('tick', 0))
+
+        with anyio.move_on_after(0.05) as scope:
+            await queue.put(('tick', 1))
+        assert scope.cancelled_caught
+
+    @pytest.mark.anyio
+    async def test_put_nowait(self):
+        queue = EventQueue(1, 'coalesce')
+        assert queue.put_nowait(window('title', 1, 0))
+        assert not queue.put_nowait(window('title', 2, 1))
+        assert queue.put_nowait(window('title', 1, 2))
+
+        assert queue.coalesced == 1
+        assert len(queue) == 1
+        assert (await queue.get())[1].n == 2
@@ -0,0 +1,32 @@
+from asway._private.framing import FrameReader, pack
+
+import pytest
+import anyio
+
+
+class ChunkStream:
+    """Hands out the given data in chunks of a fixed size."""
+    def __init__(self, data, size):
+        self.chunks = [data[i:i + size] for i in range(0, len(data), size)]
+
+    async def receive(self, max_bytes=65536):
+        if not self.chunks:
+            raise anyio.EndOfStream
+        return self.chunks.pop(0)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('size', [1, 7, 65536])
+async def test_frame_reader(size):
+    payloads = ['{"change": "focus"}', '', 'x' * 1000, '{"payload": "café"}']
+    data = b''.join(pack(n, p) for n, p in enumerate(payloads))
+    reader = FrameReader(ChunkStream(data, size))
+
+    for n, payload in enumerate(payloads):
+        message_type, body = await reader.receive()
+        assert message_type == n
+        assert isinstance(body, memoryview)
+        assert bytes(body) == payload.encode()
+
+    with pytest.raises(anyio.EndOfStream):
+        await reader.receive()
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+
+import asway
+
+
+def _modules_after(statement):
+    result = subprocess.run(
+        [sys.executable, '-c', f'{statement}; import sys; print(" ".join(sys.modules))'],
+        capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_import_is_lazy():
+    modules = _modules_after('import asway')
+    assert 'anyio' not in modules
+    assert 'asway.connection' not in modules
+    assert 'asway.con' not in modules
+
+
+def test_con_does_not_import_connection():
+    modules = _modules_after('from asway import Con')
+    assert 'anyio' not in modules
+    assert 'asway.connection' not in modules
+
+
+def test_public_names():
+    for name in asway.__all__:
+        assert getattr(asway, name) is not None
+    assert set(asway.__all__) <= set(dir(asway))
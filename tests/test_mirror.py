@@ -0,0 +1,91 @@
+from .ipctest import i3
+
+from asway import Con, TreeMirror
+from asway.events import TickEvent, WindowEvent
+
+import pytest
+import anyio
+
+
+def con(id, type='con', nodes=(), floating_nodes=()):
+    rect = {'x': 0, 'y': 0, 'width': 100, 'height': 100}
+    return {'id': id, 'type': type, 'name': str(id), 'rect': rect, 'nodes': list(nodes),
+            'floating_nodes': list(floating_nodes), 'focus': [], 'focused': False}
+
+
+def tree():
+    workspace = con(3, 'workspace', [con(10), con(11)], [con(12)])
+    return Con(con(1, 'root', [con(2, 'output', [workspace])]), None, None)
+
+
+def window_event(change, id):
+    return WindowEvent({'change': change, 'container': con(id)}, None)
+
+
+class Conn:
+    def __init__(self):
+        self.dropped_events = 0
+        self.ticks = []
+
+    async def send_tick(self, payload):
+        self.ticks.append(payload)
+
+    async def get_tree(self):
+        return tree()
+
+
+class TestTreeMirror:
+    @pytest.mark.anyio
+    async def test_tree_mirror(self, i3):
+        async with i3.connect():
+            await i3.ipc.fresh_workspace()
+            async with i3.tree_mirror() as mirror:
+                assert mirror.refetches == 1
+
+                async with i3.ipc.open_window() as win:
+                    await anyio.sleep(0.2)
+                    con = mirror.tree.find_by_window(win)
+                    assert con is not None
+                    refetches = mirror.refetches
+
+                    await i3.command(f'[id={win}] mark mirrored')
+                    await anyio.sleep(0.2)
+                    assert mirror.refetches == refetches
+                    assert mirror.tree.find_by_window(win).marks == ['mirrored']
+
+                await anyio.sleep(0.2)
+                assert mirror.tree.find_by_window(win) is None
+                assert mirror.tree.find_by_id(con.id) is None
+
+    @pytest.mark.anyio
+    async def test_sync(self, i3):
+        async with i3.connect():
+            async with i3.tree_mirror() as mirror:
+                await mirror.sync()
+                assert mirror.refetches == 2
+                assert mirror.tree.find_focused() is not None
+
+    def test_close(self):
+        mirror = TreeMirror(None)
+        mirror._tree = tree()
+
+        # floating: nothing else changes
+        assert mirror._apply(window_event('close', 12))
+        assert mirror._tree.find_by_id(12) is None
+        # tiled: the sibling is resized
+        assert not mirror._apply(window_event('close', 11))
+
+    @pytest.mark.anyio
+    async def test_dropped_events(self):
+        conn = Conn()
+        mirror = TreeMirror(conn)
+        await mirror._fetch()
+        assert mirror.refetches == 1
+
+        # the marker tick was dropped
+        conn.dropped_events = 1
+        await mirror._on_event(window_event('title', 10))
+        assert mirror.refetches == 2
+
+        await mirror._on_event(TickEvent({'first': False, 'payload': conn.ticks[-1]}))
+        assert mirror._marker is None
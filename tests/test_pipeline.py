@@ -0,0 +1,104 @@
+from .ipctest import i3
+
+from asway import Connection, Con, WorkspaceReply
+
+import pytest
+import anyio
+
+
+class TestPipeline:
+    @pytest.mark.anyio
+    async def test_concurrent_requests(self, i3):
+        results = {}
+
+        async with Connection(socket_path=i3.socket_path, pipeline=True) as conn:
+            assert conn.pipeline
+
+            async def request(n):
+                if n % 3 == 0:
+                    results[n] = await conn.get_tree()
+                elif n % 3 == 1:
+                    results[n] = await conn.get_workspaces()
+                else:
+                    results[n] = await conn.command('nop; nop')
+
+            async with anyio.create_task_group() as tg:
+                for n in range(30):
+                    tg.start_soon(request, n)
+
+        for n, result in results.items():
+            if n % 3 == 0:
+                assert type(result) is Con
+            elif n % 3 == 1:
+                assert type(result[0]) is WorkspaceReply
+            else:
+                assert len(result) == 2
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize('pipeline', [False, True])
+    async def test_command_socket_pool(self, i3, pipeline):
+        async with Connection(socket_path=i3.socket_path, pipeline=pipeline,
+                              command_sockets=3) as conn:
+            assert conn.command_sockets == 3
+
+            async def request():
+                result = await conn.command('nop')
+                assert result[0].success
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(conn.get_tree)
+                for n in range(10):
+                    tg.start_soon(request)
+
+    @pytest.mark.anyio
+    async def test_single_socket(self, i3):
+        payloads = []
+
+        async with Connection(socket_path=i3.socket_path, single_socket=True) as conn:
+            assert conn.single_socket
+            conn.on('tick', lambda e: payloads.append(e.payload))
+            await conn.subscriptions_ready()
+
+            async with anyio.create_task_group() as tg:
+                for n in range(10):
+                    tg.start_soon(conn.command, 'nop')
+                tg.start_soon(conn.get_tree)
+
+            await conn.send_tick('done')
+            tree = await conn.get_tree()
+            assert type(tree) is Con
+
+        assert payloads == ['', 'done']
+
+    @pytest.mark.anyio
+    async def test_single_socket_full_queue(self, i3):
+        payloads = []
+
+        async with Connection(socket_path=i3.socket_path, single_socket=True,
+                              event_queue_size=2) as conn:
+
+            async def on_tick(e):
+                await anyio.sleep(0.01)
+                # the reply comes after the events that did not fit in the queue
+                await conn.get_version()
+                payloads.append(e.payload)
+
+            conn.on('tick', on_tick)
+            await conn.subscriptions_ready()
+            for n in range(6):
+                await conn.send_tick(str(n))
+
+            with anyio.fail_after(5):
+                while len(payloads) < 7:
+                    await anyio.sleep(0.01)
+
+        assert payloads == ['', '0', '1', '2', '3', '4', '5']
+
+    @pytest.mark.anyio
+    async def test_lazy_subscription_socket(self, i3):
+        async with Connection(socket_path=i3.socket_path) as conn:
+            await conn.command('nop')
+            assert conn._sub_socket is None
+
+            await conn.subscribe(['tick'])
+            assert conn._sub_socket is not None
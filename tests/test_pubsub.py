@@ -0,0 +1,90 @@
+from asway._private import PubSub
+
+import pytest
+import anyio
+
+
+class WindowEvent:
+    def __init__(self, change):
+        self.change = change
+
+
+class TestPubSub:
+    @pytest.mark.anyio
+    async def test_emit(self):
+        seen = []
+
+        def on_window(e):
+            seen.append(('window', e.change))
+
+        async def on_focus(e):
+            seen.append(('focus', e.change))
+
+        pubsub = PubSub(None)
+        async with anyio.create_task_group() as tg:
+            pubsub._tg = tg
+            pubsub.subscribe('window', on_window)
+            pubsub.subscribe('window::focus', on_focus)
+            await pubsub.emit('window', WindowEvent('focus'))
+            await pubsub.emit('window', WindowEvent('title'))
+            await pubsub.emit('workspace', WindowEvent('focus'))
+
+        assert sorted(seen) == [('focus', 'focus'), ('window', 'focus'), ('window', 'title')]
+
+    @pytest.mark.anyio
+    async def test_unsubscribe(self):
+        seen = []
+
+        pubsub = PubSub(None)
+        pubsub.subscribe('tick', seen.append)
+        await pubsub.emit('tick', 1)
+        pubsub.unsubscribe(seen.append)
+        await pubsub.emit('tick', 2)
+        assert pubsub.wanted('tick') is None
+        pubsub.subscribe('tick', seen.append)
+        await pubsub.emit('tick', 3)
+
+        assert seen == [1, 3]
+
+    @pytest.mark.anyio
+    async def test_single_async_handler_is_awaited(self):
+        seen = []
+
+        async def on_tick(e):
+            await anyio.sleep(0.01)
+            seen.append(e)
+
+        pubsub = PubSub(None)
+        pubsub.subscribe('tick', on_tick)
+        await pubsub.emit('tick', 1)
+
+        assert seen == [1]
+
+    def test_wanted_is_cached(self):
+        pubsub = PubSub(None)
+        pubsub.subscribe('window::focus', print)
+        wanted = pubsub.wanted('window')
+        assert wanted == {'focus'}
+        assert pubsub.wanted('window') is wanted
+
+        pubsub.subscribe('window', print)
+        assert pubsub.wanted('window') is True
+        pubsub.unsubscribe(print)
+        assert pubsub.wanted('window') is None
+
+    @pytest.mark.anyio
+    async def test_awaited_handler(self):
+        seen = []
+
+        async def on_tick(e):
+            await anyio.sleep(0.01)
+            seen.append(e)
+
+        pubsub = PubSub(None)
+        async with anyio.create_task_group() as tg:
+            pubsub._tg = tg
+            pubsub.subscribe('tick', lambda e: None)
+            pubsub.subscribe('tick', on_tick, wait=True)
+            for n in range(3):
+                await pubsub.emit('tick', n)
+                assert seen == list(range(n + 1))
@@ -1,6 +1,9 @@
 from .ipctest import i3
 
+from asway import Event, ReconnectPolicy
+
 import pytest
+import anyio
 
 
 class TestRestart:
@@ -10,3 +13,48 @@ class TestRestart:
             i3._auto_reconnect = True
             await i3.command('restart')
             assert await i3.command('nop')
+
+    @pytest.mark.anyio
+    async def test_reconnect_events(self, i3):
+        events = []
+        reconnected = anyio.Event()
+
+        def on_disconnected(e):
+            events.append('disconnected')
+
+        def on_reconnected(e):
+            events.append('reconnected')
+            reconnected.set()
+
+        i3._reconnect_policy = ReconnectPolicy.unlimited(max_delay=0.1)
+        async with i3.connect():
+            i3._auto_reconnect = True
+            i3.on(Event.DISCONNECTED, on_disconnected)
+            i3.on(Event.RECONNECTED, on_reconnected)
+            await i3.command('restart')
+            assert await i3.command('nop')
+            await reconnected.wait()
+            assert events == ['disconnected', 'reconnected']
+
+    @pytest.mark.anyio
+    async def test_subscribe_during_outage(self, i3):
+        payloads = []
+
+        socket_path = i3.socket_path
+        i3._reconnect_policy = ReconnectPolicy.unlimited(max_delay=0.1)
+        async with i3.connect():
+            i3._auto_reconnect = True
+            # the subscription socket cannot be opened
+            i3._socket_path = socket_path + '.missing'
+            i3.on(Event.TICK, lambda e: payloads.append(e.payload))
+            await anyio.sleep(0.1)
+            assert i3._sub_socket is None
+
+            i3._socket_path = socket_path
+            await i3.command('restart')
+            assert await i3.command('nop')
+            await i3.subscriptions_ready()
+            await i3.send_tick('after')
+            await anyio.sleep(0.2)
+
+        assert payloads[-1] == 'after'
@@ -1,4 +1,5 @@
 from .ipctest import i3
+from asway import Event
 
 import pytest
 import anyio
@@ -30,3 +31,151 @@ class TestTicks:
             assert self.events[1].payload == ''
             assert not self.events[2].first
             assert self.events[2].payload == 'hello world'
+
+    @pytest.mark.anyio
+    async def test_custom_decoder(self, i3):
+        events = []
+        evt = anyio.Event()
+
+        def on_tick(e):
+            events.append(e)
+            if e['payload'] == 'raw':
+                evt.set()
+
+        async with i3.connect():
+            i3.register_event_decoder('tick', lambda data, conn: data)
+            i3.on('tick', on_tick)
+            await anyio.sleep(0.2)
+
+            await i3.send_tick('raw')
+            await evt.wait()
+
+            assert all(type(e) is dict for e in events)
+
+    @pytest.mark.anyio
+    async def test_compact_subscriptions(self, i3):
+        payloads = []
+
+        def on_tick(e):
+            payloads.append(e.payload)
+
+        def on_window(e):
+            pass
+
+        async with i3.connect():
+            i3.on('tick', on_tick)
+            i3.on('window', on_window)
+            await anyio.sleep(0.2)
+
+            i3.off(on_window)
+            await i3.send_tick('before')
+            await i3.compact_subscriptions()
+            await i3.send_tick('after')
+            await anyio.sleep(0.2)
+
+            assert i3._subscriptions == {Event.TICK}
+            assert payloads == ['', 'before', 'after']
+
+    @pytest.mark.anyio
+    async def test_auto_compact_during_outage(self, i3):
+        payloads = []
+
+        def on_window(e):
+            pass
+
+        socket_path = i3.socket_path
+        i3._auto_compact = True
+        async with i3.connect():
+            i3.on('tick', lambda e: payloads.append(e.payload))
+            i3.on('window', on_window)
+            await i3.subscriptions_ready()
+
+            # the new subscription socket cannot be opened
+            i3._socket_path = socket_path + '.missing'
+            i3.off(on_window)
+            await anyio.sleep(0.2)
+            i3._socket_path = socket_path
+
+            await i3.send_tick('after')
+            await anyio.sleep(0.2)
+
+        assert payloads == ['', 'after']
+
+    @pytest.mark.anyio
+    async def test_subscriptions_ready(self, i3):
+        payloads = []
+
+        async with i3.connect():
+            i3.on('tick', lambda e: payloads.append(e.payload))
+            i3.on('window', lambda e: None)
+            i3.on('workspace', lambda e: None)
+            await i3.subscriptions_ready()
+            assert {Event.TICK, Event.WINDOW, Event.WORKSPACE} <= i3._subscriptions
+
+            await i3.send_tick('ready')
+            await anyio.sleep(0.2)
+
+        assert payloads == ['', 'ready']
+
+    @pytest.mark.anyio
+    async def test_leave_full_event_stream(self, i3):
+        payloads = []
+
+        async with i3.connect():
+            async with i3.events(Event.TICK, buffer=1) as stream:
+                await i3.subscriptions_ready()
+                for n in range(5):
+                    await i3.send_tick(str(n))
+                async for event in stream:
+                    # the dispatcher waits for room in the buffer
+                    await anyio.sleep(0.1)
+                    break
+
+            i3.on('tick', lambda e: payloads.append(e.payload))
+            await i3.subscriptions_ready()
+            await i3.send_tick('after')
+            await anyio.sleep(0.2)
+
+        assert payloads[-1] == 'after'
+
+    @pytest.mark.anyio
+    async def test_leave_while_subscribing(self, i3):
+        payloads = []
+
+        async with i3.connect():
+            # the subscription waits for the lock when the connection closes
+            await i3._sub_lock.acquire()
+            i3.on('tick', lambda e: payloads.append(e.payload))
+            await anyio.sleep(0.1)
+        i3._sub_lock.release()
+        assert Event.TICK in i3._subscriptions
+
+        async with i3.connect():
+            with anyio.fail_after(2):
+                await i3.subscriptions_ready()
+            await i3.send_tick('again')
+            await anyio.sleep(0.2)
+
+        assert payloads == ['', 'again']
+
+    @pytest.mark.anyio
+    async def test_event_stream_with_other_handler(self, i3):
+        payloads = []
+
+        async with i3.connect():
+            i3.on('tick', lambda e: payloads.append(e.payload))
+            async with i3.events(Event.TICK, buffer=1) as stream:
+                await i3.subscriptions_ready()
+                for n in range(10):
+                    await i3.send_tick(str(n))
+                await anyio.sleep(0.2)
+                # the dispatcher waits for the stream
+                assert len(payloads) < 10
+
+                received = []
+                async for event in stream:
+                    received.append(event.payload)
+                    if event.payload == '9':
+                        break
+
+        assert received[-10:] == [str(n) for n in range(10)]
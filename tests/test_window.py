@@ -103,6 +103,37 @@ class TestWindow:
 
                 i3.off(on_window)
 
+    @pytest.mark.anyio
+    async def test_coalesced_window_event(self, i3):
+        events = []
+
+        def on_title(e):
+            events.append(e)
+
+        async with i3.connect():
+            await i3.ipc.fresh_workspace()
+            async with i3.ipc.open_window() as win:
+                i3.on('window::title', on_title, coalesce=0.2)
+                await anyio.sleep(0.1)
+                for i in range(5):
+                    await i3.command(f'[id={win}] title_format title{i}')
+                await anyio.sleep(0.5)
+                i3.off(on_title)
+
+        assert len(events) == 1
+        assert events[0].container.name == 'title4'
+
+    @pytest.mark.anyio
+    async def test_window_event_stream(self, i3):
+        async with i3.connect():
+            await i3.ipc.fresh_workspace()
+            async with i3.events(Event.WINDOW_NEW, Event.WINDOW_CLOSE) as stream:
+                async with i3.ipc.open_window():
+                    pass
+                changes = [(await stream.receive()).change for _ in range(2)]
+
+        assert changes == ['new', 'close']
+
     @pytest.mark.anyio
     async def test_marks(self, i3):
         async with i3.connect():